@@ -0,0 +1,295 @@
+"""
+Benchmark and regression suite for core.image_handling.image_operations.
+
+Runs every operation (and a few realistic chains) on synthetic images of
+1, 12 and 50 megapixels in RGB, RGBA, L and P mode, entirely offline on the CPU.
+For each case it reports:
+
+    - throughput in input megapixels per second (median of --repeat timed runs)
+    - peak memory: Python heap peak (tracemalloc) plus process RSS high-water mark
+      growth where Linux exposes it, since Pillow allocates pixel buffers outside
+      the Python allocator
+    - allocations: Python heap allocations still counted by tracemalloc plus
+      Pillow's own image-block allocations
+
+Usage (from the repository root):
+
+    python -m benchmarks.image_operations_bench --update-baseline   # record a baseline
+    python -m benchmarks.image_operations_bench                     # compare against it
+
+Comparing exits with status 1 when any case is slower, or uses more memory or
+allocations, than the baseline by more than the configured thresholds, and with
+status 2 (before running anything) when there is no baseline to compare against.
+Baselines are machine-specific, so they are kept out of version control.
+"""
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import numpy as np
+import PIL
+from PIL import Image
+from core.image_handling import image_operations
+
+SIZES = {
+    "1mp": (1152, 864),
+    "12mp": (4000, 3000),
+    "50mp": (8160, 6120),
+}
+
+MODES = ["RGB", "RGBA", "L", "P"]
+
+OPERATIONS = {
+    "resize_lanczos": lambda image: image_operations.resize(image, image.width // 2, image.height // 2),
+    "rotate_expand": lambda image: image_operations.rotate(image, 15, expand=True),
+    "apply_blur": lambda image: image_operations.apply_blur(image, 2.0),
+    "change_color_depth": lambda image: image_operations.change_color_depth(image, 4),
+    "adjust_brightness": lambda image: image_operations.adjust_brightness(image, 1.2),
+    "adjust_contrast": lambda image: image_operations.adjust_contrast(image, 1.2),
+}
+
+CHAINS = {
+    "thumbnail": ["resize_lanczos", "adjust_contrast"],
+    "ad_frame": ["rotate_expand", "apply_blur", "adjust_brightness", "adjust_contrast"],
+    "poster": ["change_color_depth", "adjust_brightness", "resize_lanczos"],
+}
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "image_operations.json")
+
+
+def synthetic_image(mode: str, size: tuple[int, int], seed: int = 0) -> Image.Image:
+    """
+    Build a deterministic test image: smooth gradients (which exercise resampling
+    and blurs like real photos do) with seeded noise (which defeats any shortcuts
+    on flat regions).
+    """
+    width, height = size
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = (x + y) / 2
+    noise = rng.integers(0, 32, size=(height, width), dtype=np.uint8)
+    if mode in ("L", "P"):
+        pixels = (base + noise).clip(0, 255).astype(np.uint8)
+        image = Image.fromarray(pixels, "L")
+        if mode == "P":
+            image = Image.frombytes("P", size, image.tobytes())
+            image.putpalette([channel for n in range(256) for channel in (n, 255 - n, (n * 3) % 256)])
+        return image
+    channels = [(base + noise).clip(0, 255), np.broadcast_to(x, (height, width)), (255 - base + noise).clip(0, 255)]
+    if mode == "RGBA":
+        channels.append(np.broadcast_to(y, (height, width)))
+    return Image.fromarray(np.dstack(channels).astype(np.uint8), mode)
+
+
+_libc = ctypes.CDLL(ctypes.util.find_library("c")) if sys.platform.startswith("linux") else None
+
+
+def _read_status_kb(field: str) -> int | None:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith(field):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _reset_rss_peak() -> bool:
+    # glibc keeps freed pixel buffers mapped, which would hide the next case's peak;
+    # trim them first, then writing 5 to clear_refs resets VmHWM to the current RSS (Linux only).
+    if _libc is not None and hasattr(_libc, "malloc_trim"):
+        _libc.malloc_trim(0)
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _run_steps(image: Image.Image, steps: list[str]) -> Image.Image:
+    for step in steps:
+        image = OPERATIONS[step](image)
+    return image
+
+
+def measure(image: Image.Image, steps: list[str], repeat: int) -> dict:
+    """
+    Time and profile one operation or chain on image.
+
+    Returns:
+        dict: median_seconds, megapixels_per_second, python_peak_bytes, rss_peak_bytes,
+              python_allocations and pillow_allocations. rss_peak_bytes is None where the
+              platform cannot reset the RSS high-water mark.
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        _run_steps(image, steps)
+        timings.append(time.perf_counter() - started)
+
+    # Memory is profiled on a separate run so tracing overhead never shows up in timings.
+    rss_peak = rss_before = None
+    if _reset_rss_peak():
+        rss_before = _read_status_kb("VmRSS:")
+    Image.core.reset_stats()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = _run_steps(image, steps)
+    after = tracemalloc.take_snapshot()
+    _, python_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    pillow_stats = Image.core.get_stats()
+    if rss_before is not None and (hwm := _read_status_kb("VmHWM:")) is not None:
+        rss_peak = max(hwm - rss_before, 0) * 1024
+    del result
+
+    python_allocations = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    median = statistics.median(timings)
+    return {
+        "median_seconds": median,
+        "megapixels_per_second": image.width * image.height / 1e6 / median,
+        "python_peak_bytes": python_peak,
+        "rss_peak_bytes": rss_peak,
+        "python_allocations": python_allocations,
+        "pillow_allocations": pillow_stats["allocated_blocks"] + pillow_stats["new_count"],
+    }
+
+
+def machine_fingerprint() -> dict:
+    return {
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "pillow": PIL.__version__,
+        "numpy": np.__version__,
+    }
+
+
+def run_suite(sizes: list[str], modes: list[str], repeat: int) -> dict:
+    """
+    Run every operation and chain for every size and mode.
+
+    Returns:
+        dict: Results keyed by "<size>/<mode>/<operation or chain:name>". Cases Pillow
+              rejects for a mode are recorded with an "unsupported" error instead of failing.
+    """
+    cases = [(name, [name]) for name in OPERATIONS] + [(f"chain:{name}", steps) for name, steps in CHAINS.items()]
+    results = {}
+    for size in sizes:
+        for mode in modes:
+            image = synthetic_image(mode, SIZES[size])
+            for name, steps in cases:
+                key = f"{size}/{mode}/{name}"
+                try:
+                    results[key] = measure(image, steps, repeat)
+                except (ValueError, OSError) as e:
+                    results[key] = {"unsupported": str(e)}
+                print(format_result(key, results[key]), flush=True)
+            del image
+    return results
+
+
+def format_result(key: str, result: dict) -> str:
+    if "unsupported" in result:
+        return f"{key:<40} unsupported: {result['unsupported']}"
+    rss = f"{result['rss_peak_bytes'] / 2 ** 20:8.1f} MiB rss" if result["rss_peak_bytes"] is not None else " " * 16
+    return (
+        f"{key:<40} {result['megapixels_per_second']:8.1f} MP/s {result['median_seconds'] * 1000:9.1f} ms "
+        f"{rss} {result['python_peak_bytes'] / 2 ** 10:8.1f} KiB py "
+        f"{result['python_allocations']:6d} py allocs {result['pillow_allocations']:5d} blocks"
+    )
+
+
+def compare(results: dict, baseline: dict, time_threshold: float, memory_threshold: float) -> list[str]:
+    """
+    Return a description of every case that regressed against the baseline.
+
+    Args:
+        results (dict): Results of the current run.
+        baseline (dict): Results of the stored baseline.
+        time_threshold (float): Allowed relative slowdown of the median time (0.25 = 25%).
+        memory_threshold (float): Allowed relative growth of peak memory and allocation counts.
+    """
+    regressions = []
+    for key, result in results.items():
+        previous = baseline.get(key)
+        if previous is None or "unsupported" in result or "unsupported" in previous:
+            continue
+        checks = [("median_seconds", time_threshold)] + [
+            (metric, memory_threshold)
+            for metric in ("python_peak_bytes", "rss_peak_bytes", "python_allocations", "pillow_allocations")
+        ]
+        for metric, threshold in checks:
+            old, new = previous.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            # Tiny absolute values are noise: a handful of allocations or a few KiB is not a regression.
+            floor = {"median_seconds": 0.002, "python_allocations": 50, "pillow_allocations": 2}.get(metric, 64 * 1024)
+            if new > old * (1 + threshold) and new - old > floor:
+                regressions.append(f"{key}: {metric} {old:.4g} -> {new:.4g} (+{(new / old - 1) * 100 if old else float('inf'):.0f}%)")
+    return regressions
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark image_operations and check for regressions.")
+    parser.add_argument("--sizes", default=",".join(SIZES), help=f"Comma-separated subset of {', '.join(SIZES)}")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"Comma-separated subset of {', '.join(MODES)}")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case; the median is reported")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--time-threshold", type=float, default=0.25, help="Allowed relative slowdown")
+    parser.add_argument("--memory-threshold", type=float, default=0.10, help="Allowed relative memory/allocation growth")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes.split(",")
+    modes = args.modes.split(",")
+    unknown = [size for size in sizes if size not in SIZES] + [mode for mode in modes if mode not in MODES]
+    if unknown:
+        parser.error(f"Unknown size or mode: {', '.join(unknown)}")
+
+    if not args.update_baseline and not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline first.")
+        return 2
+
+    fingerprint = machine_fingerprint()
+    results = run_suite(sizes, modes, args.repeat)
+
+    if args.update_baseline:
+        baseline = {"fingerprint": fingerprint, "results": {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+            baseline["fingerprint"] = fingerprint
+        baseline["results"].update(results)
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("fingerprint") != fingerprint:
+        print("⚠️ Baseline was recorded on a different machine or library versions; timings may not be comparable.")
+    regressions = compare(results, baseline["results"], args.time_threshold, args.memory_threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s):")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("\n✅ No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,63 @@
 import asyncio
 import json
+import threading
 from colorama import init, Fore, Style
-from core import gemini_client
+from core import gemini_client, output_writer, sound_client
 from core.gemini.gemini import ImagePromptResponse
 from core.video_handling import video_operations
-from core.sound_handling import sounds
+from core.io_handling import io_executor
+from settings import settings
 from moviepy.editor import VideoFileClip, AudioClip
 
 # Initialize colorama for beautiful colors
 init(autoreset=True)
 
+async def ainput(prompt: str) -> str:
+    """
+    Read a line from stdin without blocking the event loop.
+
+    The read runs on a daemon thread rather than the default executor: a thread stuck in
+    input() would otherwise keep asyncio.run from returning after Ctrl-C until Enter is pressed.
+    EOF (Ctrl-D) is raised as EOFError.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def settle(result, error):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def read():
+        result, error = None, None
+        try:
+            result = input(prompt)
+        except Exception as e:
+            error = e
+        try:
+            loop.call_soon_threadsafe(settle, result, error)
+        except RuntimeError:
+            pass  # the loop already shut down
+
+    threading.Thread(target=read, daemon=True, name="image-engineer-input").start()
+    return await future
+
+def save_in_background(image, output_path: str, label: str):
+    """
+    Queue an image on the background encoder pool and report when it lands on disk.
+    """
+    def report(future):
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            print(Fore.RED + f"Error saving {label.lower()} to {output_path}: {future.exception()}")
+        else:
+            print(Fore.GREEN + f"{label} saved as {future.result().path}")
+    output_writer.submit(image, output_path).add_done_callback(report)
+
 def display_banner():
     banner = fr"""{Fore.MAGENTA}{Style.BRIGHT}
 .__                                                      .__                            
@@ -22,7 +70,7 @@ def display_banner():
     print(banner)
 
 async def generate_text():
-    prompt = input(Fore.YELLOW + "Enter your text prompt: ")
+    prompt = await ainput(Fore.YELLOW + "Enter your text prompt: ")
     print(Fore.CYAN + "Generating text response...")
     try:
         result = await gemini_client.raw_ainvoke(prompt)
@@ -32,30 +80,43 @@ async def generate_text():
         print(Fore.RED + f"Error generating text: {e}")
 
 async def create_image():
-    prompt = input(Fore.YELLOW + "Enter your image generation prompt: ")
-    output_path = input(Fore.YELLOW + "Enter output image filename (e.g., output.png): ")
+    prompt = await ainput(Fore.YELLOW + "Enter your image generation prompt: ")
+    output_path = await ainput(Fore.YELLOW + "Enter output image filename (e.g., output.png): ")
     print(Fore.CYAN + "Generating image...")
     try:
         image = await gemini_client.create_image(prompt)
-        image.save(output_path)
-        print(Fore.GREEN + f"Image saved as {output_path}")
+        save_in_background(image, output_path, "Image")
     except Exception as e:
         print(Fore.RED + f"Error creating image: {e}")
 
+async def create_image_variants():
+    prompt = await ainput(Fore.YELLOW + "Enter your image generation prompt: ")
+    count_input = await ainput(Fore.YELLOW + "How many variants? (e.g., 4): ")
+    base_filename = await ainput(Fore.YELLOW + "Enter base filename for the variants (e.g., variant): ")
+    try:
+        count = int(count_input) if count_input.strip() else 4
+        print(Fore.CYAN + f"Generating {count} image variants...")
+        n = 0
+        async for image in gemini_client.stream_image_variants(prompt, count):
+            output_path = f"{base_filename}_{n}.png"
+            save_in_background(image, output_path, "Variant")
+            n += 1
+    except Exception as e:
+        print(Fore.RED + f"Error creating image variants: {e}")
+
 async def edit_image():
-    image_path = input(Fore.YELLOW + "Enter the path of the image to edit: ")
-    prompt = input(Fore.YELLOW + "Enter your editing prompt: ")
-    output_path = input(Fore.YELLOW + "Enter output image filename for edited image (e.g., edited.png): ")
+    image_path = await ainput(Fore.YELLOW + "Enter the path of the image to edit: ")
+    prompt = await ainput(Fore.YELLOW + "Enter your editing prompt: ")
+    output_path = await ainput(Fore.YELLOW + "Enter output image filename for edited image (e.g., edited.png): ")
     print(Fore.CYAN + "Editing image...")
     try:
         image = await gemini_client.edit_image(image_path, prompt)
-        image.save(output_path)
-        print(Fore.GREEN + f"Edited image saved as {output_path}")
+        save_in_background(image, output_path, "Edited image")
     except Exception as e:
         print(Fore.RED + f"Error editing image: {e}")
 
 async def describe_image():
-    image_path = input(Fore.YELLOW + "Enter the path of the image to describe: ")
+    image_path = await ainput(Fore.YELLOW + "Enter the path of the image to describe: ")
     print(Fore.CYAN + "Describing image...")
     try:
         description = await gemini_client.describe_image(image_path)
@@ -65,17 +126,17 @@ async def describe_image():
         print(Fore.RED + f"Error describing image: {e}")
 
 async def get_bounding_boxes():
-    image_path = input(Fore.YELLOW + "Enter the path of the image: ")
+    image_path = await ainput(Fore.YELLOW + "Enter the path of the image: ")
     print(Fore.CYAN + "Retrieving bounding boxes...")
     try:
         boxes = await gemini_client.get_bounding_objects(image_path)
         print(Fore.GREEN + "\nBounding Boxes (normalized):")
-        print(json.dumps(boxes, indent=2))
+        print(json.dumps(boxes.to_list(), indent=2))
     except Exception as e:
         print(Fore.RED + f"Error retrieving bounding boxes: {e}")
 
 async def get_segmentation():
-    image_path = input(Fore.YELLOW + "Enter the path of the image: ")
+    image_path = await ainput(Fore.YELLOW + "Enter the path of the image: ")
     print(Fore.CYAN + "Retrieving segmentation masks...")
     try:
         segmentation = await gemini_client.get_segmentation(image_path)
@@ -85,8 +146,8 @@ async def get_segmentation():
         print(Fore.RED + f"Error retrieving segmentation: {e}")
 
 async def generate_video_from_prompt():
-    prompt = input(Fore.YELLOW + "Enter your video generation prompt: ")
-    output_path = input(Fore.YELLOW + "Enter output video filename (e.g., output_video.mp4): ")
+    prompt = await ainput(Fore.YELLOW + "Enter your video generation prompt: ")
+    output_path = await ainput(Fore.YELLOW + "Enter output video filename (e.g., output_video.mp4): ")
     print(Fore.CYAN + "Generating video from prompt...")
     try:
         await gemini_client.generate_video_from_prompt(prompt, output_path)
@@ -95,9 +156,9 @@ async def generate_video_from_prompt():
         print(Fore.RED + f"Error generating video from prompt: {e}")
 
 async def generate_video_from_image():
-    image_path = input(Fore.YELLOW + "Enter the path of the image: ")
-    prompt = input(Fore.YELLOW + "Enter your video generation prompt: ")
-    output_path = input(Fore.YELLOW + "Enter output video filename (e.g., output_video.mp4): ")
+    image_path = await ainput(Fore.YELLOW + "Enter the path of the image: ")
+    prompt = await ainput(Fore.YELLOW + "Enter your video generation prompt: ")
+    output_path = await ainput(Fore.YELLOW + "Enter output video filename (e.g., output_video.mp4): ")
     print(Fore.CYAN + "Generating video from image...")
     try:
         await gemini_client.generate_video_from_image(image_path, prompt, output_path)
@@ -106,9 +167,9 @@ async def generate_video_from_image():
         print(Fore.RED + f"Error generating video from image: {e}")
 
 async def create_commercial_ad():
-    image_path = input(Fore.YELLOW + "Enter the path of the product image: ")
-    output_path = input(Fore.YELLOW + "Enter output video filename (e.g., commercial.mp4): ")
-    skip_image_creation = input(Fore.YELLOW + "Skip image creation? (y/n): ")
+    image_path = await ainput(Fore.YELLOW + "Enter the path of the product image: ")
+    output_path = await ainput(Fore.YELLOW + "Enter output video filename (e.g., commercial.mp4): ")
+    skip_image_creation = await ainput(Fore.YELLOW + "Skip image creation? (y/n): ")
     print(Fore.CYAN + "Creating commercial ad...")
     try:
         description = await gemini_client.describe_image(image_path)
@@ -119,8 +180,10 @@ async def create_commercial_ad():
 async def prompt_to_commercial_ad():
     try:
         # Step 1: Get full product strategy from user
-        product_strategy_path = input(Fore.YELLOW + "Enter your full product strategy txt path: ")
-        base_filename = input(Fore.YELLOW + "Enter base filename for all outputs (e.g., commercial): ")
+        product_strategy_path = await ainput(Fore.YELLOW + "Enter your full product strategy txt path: ")
+        base_filename = await ainput(Fore.YELLOW + "Enter base filename for all outputs (e.g., commercial): ")
+        ad_seconds_input = await ainput(Fore.YELLOW + f"Enter the ad length in seconds (default {settings.STORYBOARD_TOTAL_SECONDS}): ")
+        ad_seconds = int(ad_seconds_input) if ad_seconds_input.strip() else settings.STORYBOARD_TOTAL_SECONDS
 
         product_image_filename = f"./images/{base_filename}.png"
         sound_effect_filename = f"./sounds/{base_filename}.mp3"
@@ -128,15 +191,13 @@ async def prompt_to_commercial_ad():
         final_video_filename = f"./videos/{base_filename}_final.mp4"
         silent_audio_filename = "./sounds/silent_audio.mp3"
 
-        with open(product_strategy_path, 'r') as file:
-            product_strategy = file.read()
+        product_strategy = await io_executor.read_text(product_strategy_path)
         # Step 2: Generate product image
         image_prompt = f"Given this product strategy: {product_strategy}, generate a prompt to send to an AI image generator to create a highly professional image of the product, just answer that prompt ready to copy and paste into the image generator prompt. Do not include any other text or comments."
         image_creation_prompt = await gemini_client.raw_ainvoke(image_prompt)
         print(Fore.CYAN + "Generating product image...")
         product_image = await gemini_client.create_image(image_creation_prompt)
-        product_image.save(product_image_filename)
-        print(Fore.GREEN + f"Product image saved as {product_image_filename}")
+        save_in_background(product_image, product_image_filename, "Product image")
         
         # Step 3: Generate commercial ad strategy using the product strategy
         ad_prompt = f"Given this product strategy: {product_strategy}, create a fully professional ad storytelling plan. Describe step by step what the ad should show, including visual effects and transitions."
@@ -144,9 +205,9 @@ async def prompt_to_commercial_ad():
         ad_strategy = await gemini_client.raw_ainvoke(ad_prompt)
         print(Fore.GREEN + "Commercial ad strategy generated.")
         
-        # Step 4: Generate commercial ad video from the ad strategy
+        # Step 4: Generate commercial ad video from the ad strategy, one concurrently generated Veo clip per shot
         print(Fore.CYAN + "Generating commercial ad video...")
-        await gemini_client.generate_video_from_prompt(ad_strategy, video_filename)
+        await gemini_client.generate_storyboard_video(ad_strategy, video_filename, total_seconds=ad_seconds)
         print(Fore.GREEN + f"Commercial ad video saved as {video_filename}")
         
         # Step 5: Generate sound effect for the ad using the ad strategy
@@ -156,13 +217,13 @@ async def prompt_to_commercial_ad():
         print(Fore.CYAN + "Generating sound effect...")
         try:
             clip = VideoFileClip(video_filename)
-            video_duration = int(clip.duration)
+            video_duration = clip.duration
             clip.close()
         except Exception:
-            video_duration = 10  # Fallback duration if video length isn't obtainable
-        sound_bytes = await sounds.text_to_effect(sound_effect_prompt_concise, duration_seconds=video_duration)
-        with open(sound_effect_filename, "wb") as f:
-            f.write(sound_bytes)
+            video_duration = ad_seconds  # Fallback to the requested length if the video can't be read
+        # Segments are crossfaded, so the effect matches the video length even past the 22 s API cap
+        sound_bytes = await sound_client.text_to_long_effect(sound_effect_prompt_concise, duration_seconds=video_duration)
+        await io_executor.write_bytes(sound_effect_filename, sound_bytes)
         print(Fore.GREEN + f"Sound effect saved as {sound_effect_filename}")
         
         # Step 6: Merge the video and sound effect using video handling
@@ -182,6 +243,25 @@ async def prompt_to_commercial_ad():
 
 async def main_menu():
     display_banner()
+    lag_detector = None
+    if settings.LOOP_LAG_MONITOR:
+        lag_detector = io_executor.LoopLagDetector()
+        lag_detector.start()
+    try:
+        await run_menu()
+    except EOFError:
+        print(Fore.MAGENTA + "\nExiting. Goodbye!")
+    finally:
+        # Also reached on Ctrl-C (asyncio.run cancels this task), so queued image writes still land.
+        await output_writer.drain()
+        output_writer.close()
+        if lag_detector is not None:
+            await lag_detector.stop()
+
+async def run_menu():
+    resumed_jobs = await gemini_client.resume_video_jobs()
+    if resumed_jobs:
+        print(Fore.CYAN + f"Resuming {resumed_jobs} pending video generation job(s) in the background...")
     while True:
         print(Fore.BLUE + Style.BRIGHT + "\nMenu:")
         print(Fore.BLUE + "1. Generate Text Response")
@@ -194,8 +274,9 @@ async def main_menu():
         print(Fore.BLUE + "8. Generate Video from Image")
         print(Fore.BLUE + "9. Create Commercial Ad")
         print(Fore.BLUE + "10. Prompt-to-commercial-ad")
-        print(Fore.BLUE + "11. Quit")
-        choice = input(Fore.YELLOW + "\nEnter your choice (1-11): ")
+        print(Fore.BLUE + "11. Create Image Variants")
+        print(Fore.BLUE + "12. Quit")
+        choice = await ainput(Fore.YELLOW + "\nEnter your choice (1-12): ")
         
         if choice == "1":
             await generate_text()
@@ -218,10 +299,15 @@ async def main_menu():
         elif choice == "10":
             await prompt_to_commercial_ad()
         elif choice == "11":
+            await create_image_variants()
+        elif choice == "12":
             print(Fore.MAGENTA + "Exiting. Goodbye!")
             break
         else:
             print(Fore.RED + "Invalid choice. Please try again.")
 
 if __name__ == "__main__":
-    asyncio.run(main_menu())
+    try:
+        asyncio.run(main_menu())
+    except KeyboardInterrupt:
+        print(Fore.MAGENTA + "\nInterrupted. Goodbye!")
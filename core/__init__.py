@@ -1,5 +1,32 @@
-from core.gemini.gemini import GeminiAsyncClient
+# The shared clients are built on first access rather than at import, so importing a
+# submodule (the daemon, the benchmarks) never probes the daemon socket or builds a client.
+_SHARED = ("gemini_client", "sound_client", "output_writer")
 
-# Instantiate the GeminiAsyncClient
-gemini_client = GeminiAsyncClient()
 
+def _build_shared() -> None:
+    from core.gemini.gemini import GeminiAsyncClient
+    from core.image_handling.output_writer import OutputWriter
+    from core.sound_handling import sounds
+    from core.daemon.remote_client import RemoteGeminiClient, RemoteSounds, DaemonConnection, daemon_available
+    from settings import settings
+
+    if settings.DAEMON_AUTO_CONNECT and daemon_available():
+        # A local daemon is running: share its client pool, scheduler and cache
+        daemon_connection = DaemonConnection()
+        gemini_client = RemoteGeminiClient(daemon_connection)
+        sound_client = RemoteSounds(daemon_connection)
+    else:
+        # Instantiate the GeminiAsyncClient
+        gemini_client = GeminiAsyncClient()
+        sound_client = sounds
+
+    # Background encoder pool shared by everything that writes generated images
+    output_writer = OutputWriter()
+    globals().update(gemini_client=gemini_client, sound_client=sound_client, output_writer=output_writer)
+
+
+def __getattr__(name: str):
+    if name in _SHARED:
+        _build_shared()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
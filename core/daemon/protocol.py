@@ -0,0 +1,82 @@
+import base64
+import io
+import json
+from PIL import Image
+from core.gemini.responses import GenerationResult, InlineImage, Usage
+from core.image_handling.boxes import BoxArray
+from core.video_handling.video_analysis import TrackEntry, VideoTrack
+
+# Each message is one JSON object per line; binary payloads travel base64-encoded.
+STREAM_LIMIT = 256 * 1024 * 1024
+
+
+def encode_value(value):
+    """
+    Convert a result or argument into JSON-serializable form, tagging the types
+    that need to be rebuilt on the other side.
+    """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"__bytes__": base64.b64encode(bytes(value)).decode()}
+    if isinstance(value, Image.Image):
+        with io.BytesIO() as buffer:
+            value.save(buffer, format=value.format or "PNG")
+            return {"__image__": base64.b64encode(buffer.getvalue()).decode()}
+    if isinstance(value, BoxArray):
+        return {"__boxes__": base64.b64encode(value.to_bytes()).decode()}
+    if isinstance(value, VideoTrack):
+        return {"__track__": {
+            "video_path": value.video_path,
+            "entries": [[entry.timestamp, entry.frame_index, encode_value(entry.result)] for entry in value.entries],
+        }}
+    if isinstance(value, GenerationResult):
+        return {"__generation__": {
+            "text": value.text,
+            "images": [[base64.b64encode(image.data).decode(), image.mime_type] for image in value.images],
+            "usage": [value.usage.prompt_tokens, value.usage.output_tokens, value.usage.total_tokens],
+            "finish_reason": value.finish_reason,
+        }}
+    if isinstance(value, (list, tuple)):
+        return [encode_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: encode_value(item) for key, item in value.items()}
+    return value
+
+
+def decode_value(value):
+    """
+    Inverse of encode_value.
+    """
+    if isinstance(value, list):
+        return [decode_value(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if "__bytes__" in value:
+        return base64.b64decode(value["__bytes__"])
+    if "__image__" in value:
+        return Image.open(io.BytesIO(base64.b64decode(value["__image__"])))
+    if "__boxes__" in value:
+        return BoxArray.from_bytes(base64.b64decode(value["__boxes__"]))
+    if "__track__" in value:
+        track = value["__track__"]
+        return VideoTrack(
+            video_path=track["video_path"],
+            entries=[TrackEntry(timestamp, frame_index, decode_value(result))
+                     for timestamp, frame_index, result in track["entries"]],
+        )
+    if "__generation__" in value:
+        generation = value["__generation__"]
+        return GenerationResult(
+            text=generation["text"],
+            images=[InlineImage(memoryview(base64.b64decode(data)), mime_type) for data, mime_type in generation["images"]],
+            usage=Usage(*generation["usage"]),
+            finish_reason=generation["finish_reason"],
+        )
+    return {key: decode_value(item) for key, item in value.items()}
+
+
+def dump_message(message: dict) -> bytes:
+    return json.dumps(encode_value(message), separators=(",", ":")).encode() + b"\n"
+
+
+def load_message(line: bytes) -> dict:
+    return decode_value(json.loads(line))
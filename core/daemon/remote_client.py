@@ -0,0 +1,203 @@
+import asyncio
+import itertools
+import os
+import socket
+from pydantic import BaseModel
+from core.daemon import protocol
+from core.gemini.gemini import BaseResponse
+from core.gemini.responses import GenerationResult
+from core.sound_handling.sounds import JOSH_VOICE_ID
+from settings import settings
+
+
+def daemon_available(socket_path: str = None) -> bool:
+    """
+    Return True if a daemon is accepting connections on socket_path.
+    """
+    socket_path = socket_path or settings.DAEMON_SOCKET_PATH
+    if not os.path.exists(socket_path):
+        return False
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        probe.settimeout(0.5)
+        try:
+            probe.connect(socket_path)
+        except OSError:
+            return False
+    return True
+
+
+def _absolute(path):
+    # The daemon runs in its own working directory, so relative paths are resolved here.
+    if isinstance(path, str):
+        return os.path.abspath(path)
+    if isinstance(path, list):
+        return [_absolute(item) for item in path]
+    return path
+
+
+class DaemonConnection:
+    """
+    One multiplexed connection to the daemon shared by every call of a process.
+
+    Requests are tagged with an id and may complete in any order; a single reader
+    task routes each response to the future waiting on it.
+    """
+
+    def __init__(self, socket_path: str = None):
+        self.socket_path = socket_path or settings.DAEMON_SOCKET_PATH
+        self._ids = itertools.count()
+        self._futures: dict[int, asyncio.Future] = {}
+        self._writer: asyncio.StreamWriter | None = None
+        self._reader_task: asyncio.Task | None = None
+        self._connect_lock: asyncio.Lock | None = None
+
+    async def _ensure_connected(self) -> None:
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._writer is not None and not self._writer.is_closing():
+                return
+            reader, self._writer = await asyncio.open_unix_connection(self.socket_path, limit=protocol.STREAM_LIMIT)
+            self._reader_task = asyncio.get_running_loop().create_task(self._read_responses(reader))
+
+    async def _read_responses(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while line := await reader.readline():
+                response = protocol.load_message(line)
+                future = self._futures.pop(response["id"], None)
+                if future is None or future.done():
+                    continue
+                if "error" in response:
+                    future.set_exception(RuntimeError(f"Daemon error: {response['error']}"))
+                else:
+                    future.set_result(response.get("result"))
+        finally:
+            self._writer = None
+            for future in self._futures.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Lost connection to the Image Engineer daemon"))
+            self._futures.clear()
+
+    async def call(self, op: str, **args):
+        """
+        Run an operation on the daemon and return its decoded result.
+        """
+        await self._ensure_connected()
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._futures[request_id] = future
+        self._writer.write(protocol.dump_message({"id": request_id, "op": op, "args": args}))
+        await self._writer.drain()
+        return await future
+
+
+class RemoteGeminiClient:
+    """
+    Drop-in replacement for GeminiAsyncClient that forwards every call to the daemon.
+    """
+
+    def __init__(self, connection: DaemonConnection = None):
+        self.connection = connection or DaemonConnection()
+
+    async def resume_video_jobs(self) -> int:
+        return await self.connection.call("resume_video_jobs")
+
+    async def raw_ainvoke(self, prompt: str) -> str:
+        return await self.connection.call("raw_ainvoke", prompt=prompt)
+
+    async def ainvoke(self, prompt: str, schema: BaseModel = BaseResponse) -> BaseModel:
+        # The schema travels by import path and is rebuilt from the returned fields.
+        result = await self.connection.call("ainvoke", prompt=prompt,
+                                            schema=f"{schema.__module__}:{schema.__qualname__}")
+        return schema.model_validate(result)
+
+    async def describe_image(self, image_path: str | bytes) -> str:
+        return await self.connection.call("describe_image", image_path=_absolute(image_path))
+
+    async def create_image(self, prompt: str):
+        return await self.connection.call("create_image", prompt=prompt)
+
+    async def create_image_result(self, prompt: str) -> GenerationResult:
+        return await self.connection.call("create_image_result", prompt=prompt)
+
+    async def create_image_variants(self, prompt: str, count: int = 4, aspect_ratio: str = "1:1") -> list:
+        return await self.connection.call("create_image_variants", prompt=prompt, count=count,
+                                          aspect_ratio=aspect_ratio)
+
+    async def stream_image_variants(self, prompt: str, count: int = 4, aspect_ratio: str = "1:1"):
+        for image in await self.create_image_variants(prompt, count, aspect_ratio):
+            yield image
+
+    async def generate_video_from_prompt(self, prompt: str, filename: str = "output_video.mp4", duration_seconds: int = None):
+        return await self.connection.call("generate_video_from_prompt", prompt=prompt, filename=_absolute(filename),
+                                          duration_seconds=duration_seconds)
+
+    async def generate_storyboard_video(self, ad_strategy: str, filename: str = "output_video.mp4",
+                                        total_seconds: int = None) -> str:
+        return await self.connection.call("generate_storyboard_video", ad_strategy=ad_strategy,
+                                          filename=_absolute(filename), total_seconds=total_seconds)
+
+    async def generate_video_from_image(self, image_path: str, prompt: str, filename: str = "output_video",
+                                        skip_image_creation: bool = False):
+        return await self.connection.call("generate_video_from_image", image_path=_absolute(image_path),
+                                          prompt=prompt, filename=_absolute(filename),
+                                          skip_image_creation=skip_image_creation)
+
+    async def edit_image(self, image_path: str, prompt: str):
+        return await self.connection.call("edit_image", image_path=_absolute(image_path), prompt=prompt)
+
+    async def edit_image_result(self, image_path: str, prompt: str) -> GenerationResult:
+        return await self.connection.call("edit_image_result", image_path=_absolute(image_path), prompt=prompt)
+
+    async def get_bounding_objects(self, image_path: str | bytes, object_prompt: str = None):
+        return await self.connection.call("get_bounding_objects", image_path=_absolute(image_path),
+                                          object_prompt=object_prompt)
+
+    async def get_segmentation(self, image_path: str | bytes, prompt: str = None) -> list:
+        return await self.connection.call("get_segmentation", image_path=_absolute(image_path), prompt=prompt)
+
+    async def describe_images(self, image_paths: list[str | bytes], similarity_threshold: float = None) -> list[str]:
+        return await self.connection.call("describe_images", image_paths=_absolute(image_paths),
+                                          similarity_threshold=similarity_threshold)
+
+    async def get_bounding_objects_batch(self, image_paths: list[str | bytes], object_prompt: str = None,
+                                         similarity_threshold: float = None) -> list:
+        return await self.connection.call("get_bounding_objects_batch", image_paths=_absolute(image_paths),
+                                          object_prompt=object_prompt, similarity_threshold=similarity_threshold)
+
+    async def get_segmentations(self, image_paths: list[str | bytes], prompt: str = None,
+                                similarity_threshold: float = None) -> list:
+        return await self.connection.call("get_segmentations", image_paths=_absolute(image_paths), prompt=prompt,
+                                          similarity_threshold=similarity_threshold)
+
+    async def describe_video(self, video_path: str, sample_fps: float = None, scene_threshold: float = None):
+        return await self.connection.call("describe_video", video_path=_absolute(video_path),
+                                          sample_fps=sample_fps, scene_threshold=scene_threshold)
+
+    async def detect_in_video(self, video_path: str, object_prompt: str = None, sample_fps: float = None,
+                              scene_threshold: float = None):
+        return await self.connection.call("detect_in_video", video_path=_absolute(video_path),
+                                          object_prompt=object_prompt, sample_fps=sample_fps,
+                                          scene_threshold=scene_threshold)
+
+
+class RemoteSounds:
+    """
+    Forwards the ElevenLabs calls of core.sound_handling.sounds to the daemon.
+    """
+
+    def __init__(self, connection: DaemonConnection = None):
+        self.connection = connection or DaemonConnection()
+
+    async def text_to_effect(self, effect_description: str, duration_seconds: float = 5,
+                             prompt_influence: float = 0.8) -> bytes:
+        return await self.connection.call("text_to_effect", effect_description=effect_description,
+                                          duration_seconds=duration_seconds, prompt_influence=prompt_influence)
+
+    async def text_to_long_effect(self, effect_description: str, duration_seconds: float,
+                                  prompt_influence: float = 0.8) -> bytes:
+        return await self.connection.call("text_to_long_effect", effect_description=effect_description,
+                                          duration_seconds=duration_seconds, prompt_influence=prompt_influence)
+
+    async def text_to_speech(self, text: str, voice_id: str = JOSH_VOICE_ID) -> bytes:
+        return await self.connection.call("text_to_speech", text=text, voice_id=voice_id)
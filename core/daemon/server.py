@@ -0,0 +1,215 @@
+import asyncio
+import hashlib
+import importlib
+import json
+import os
+import time
+from collections import OrderedDict
+from pydantic import BaseModel
+from core.gemini.gemini import GeminiAsyncClient
+from core.sound_handling import sounds
+from core.daemon import protocol
+from core.daemon.remote_client import daemon_available
+from core.io_handling import io_executor
+from settings import settings
+
+GEMINI_OPERATIONS = {
+    "raw_ainvoke",
+    "describe_image",
+    "create_image",
+    "create_image_result",
+    "create_image_variants",
+    "edit_image",
+    "edit_image_result",
+    "get_bounding_objects",
+    "get_segmentation",
+    "describe_images",
+    "get_bounding_objects_batch",
+    "get_segmentations",
+    "describe_video",
+    "detect_in_video",
+    "generate_video_from_prompt",
+    "generate_video_from_image",
+    "generate_storyboard_video",
+    "resume_video_jobs",
+}
+
+SOUND_OPERATIONS = {
+    "text_to_effect",
+    "text_to_long_effect",
+    "text_to_speech",
+}
+
+# Veo calls wait minutes on the job poller, so they get their own limit instead of
+# holding slots that short describe/detect calls need.
+LONG_RUNNING_OPERATIONS = {
+    "generate_video_from_prompt",
+    "generate_video_from_image",
+    "generate_storyboard_video",
+}
+
+# Analysis results only depend on their inputs, so they are shared between all connected processes.
+CACHEABLE_OPERATIONS = {
+    "describe_image",
+    "get_bounding_objects",
+    "get_segmentation",
+    "describe_video",
+    "detect_in_video",
+}
+
+
+class JobServer:
+    """
+    Local daemon serving GeminiAsyncClient and sounds operations over a Unix socket.
+
+    Every CLI and worker process on the machine talks to one server, so they share
+    one client pool (warm connections, per-key quota tracking and model routing),
+    one global scheduler bounding concurrent upstream calls (with a separate limit
+    for long-running video generations), and one result cache.
+    """
+
+    def __init__(self, socket_path: str = None, gemini_client: GeminiAsyncClient = None):
+        """
+        Args:
+            socket_path (str): Unix socket to listen on. Defaults to DAEMON_SOCKET_PATH.
+            gemini_client (GeminiAsyncClient): Client to serve. A new one is created when omitted.
+        """
+        self.socket_path = socket_path or settings.DAEMON_SOCKET_PATH
+        self.gemini = gemini_client or GeminiAsyncClient()
+        self.scheduler = asyncio.Semaphore(settings.DAEMON_MAX_CONCURRENT)
+        self.video_scheduler = asyncio.Semaphore(settings.DAEMON_MAX_CONCURRENT_VIDEOS)
+        self.cache: OrderedDict = OrderedDict()
+        self.in_flight: dict = {}
+
+    async def serve_forever(self) -> None:
+        """
+        Listen on the socket until cancelled, resuming pending video jobs first.
+        """
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)  # stale socket from a previous run
+        server = await asyncio.start_unix_server(self._handle_connection, path=self.socket_path,
+                                                 limit=protocol.STREAM_LIMIT)
+        os.chmod(self.socket_path, 0o600)
+        resumed = await self.gemini.resume_video_jobs()
+        print(f"🛰️ Image Engineer daemon listening on {self.socket_path} ({resumed} video job(s) resumed)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def respond(line: bytes) -> None:
+            # Messages carry base64 images, so (de)serialization runs on the I/O pool, not the event loop.
+            response = {"id": None}
+            try:
+                request = await io_executor.run_io(protocol.load_message, line)
+                response["id"] = request.get("id")
+                response["result"] = await self.dispatch(request["op"], request.get("args", {}))
+                message = await io_executor.run_io(protocol.dump_message, response)
+            except Exception as e:
+                message = protocol.dump_message({"id": response["id"], "error": f"{type(e).__name__}: {e}"})
+            async with write_lock:
+                writer.write(message)
+                await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                task = asyncio.ensure_future(respond(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def dispatch(self, op: str, args: dict):
+        """
+        Run one operation through the shared scheduler and cache.
+        """
+        if op == "ainvoke":
+            return await self._ainvoke(**args)
+        if op in GEMINI_OPERATIONS:
+            function = getattr(self.gemini, op)
+        elif op in SOUND_OPERATIONS:
+            function = getattr(sounds, op)
+        else:
+            raise ValueError(f"Unknown operation: {op}")
+
+        if op in LONG_RUNNING_OPERATIONS:
+            async with self.video_scheduler:
+                return await function(**args)
+        if op not in CACHEABLE_OPERATIONS:
+            async with self.scheduler:
+                return await function(**args)
+
+        key = self._cache_key(op, args)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        if key not in self.in_flight:
+            self.in_flight[key] = asyncio.ensure_future(self._run_scheduled(function, args))
+        task = self.in_flight[key]
+        try:
+            result = await asyncio.shield(task)
+        finally:
+            if task.done():
+                self.in_flight.pop(key, None)
+        self.cache[key] = result
+        while len(self.cache) > settings.DAEMON_CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return result
+
+    async def _ainvoke(self, prompt: str, schema: str) -> dict:
+        # Structured-output schemas are passed by import path ("module:QualName").
+        module_name, _, qualname = schema.partition(":")
+        schema_class = importlib.import_module(module_name)
+        for attribute in qualname.split("."):
+            schema_class = getattr(schema_class, attribute)
+        if not (isinstance(schema_class, type) and issubclass(schema_class, BaseModel)):
+            raise TypeError(f"{schema} is not a pydantic model")
+        async with self.scheduler:
+            result = await self.gemini.ainvoke(prompt, schema_class)
+        return result.model_dump()
+
+    async def _run_scheduled(self, function, args: dict):
+        async with self.scheduler:
+            return await function(**args)
+
+    @staticmethod
+    def _cache_key(op: str, args: dict) -> str:
+        # File arguments are keyed by path, size and mtime so edited files are not served stale results.
+        fingerprint = {}
+        for name, value in sorted(args.items()):
+            if isinstance(value, str) and name.endswith("_path") and os.path.exists(value):
+                stat = os.stat(value)
+                value = [value, stat.st_size, stat.st_mtime_ns]
+            elif isinstance(value, (bytes, bytearray)):
+                value = ["bytes", hashlib.sha256(value).hexdigest()]
+            fingerprint[name] = value
+        return f"{op}:{json.dumps(fingerprint, sort_keys=True, default=str)}"
+
+
+async def main():
+    if daemon_available():
+        print("An Image Engineer daemon is already running.")
+        return
+    server = JobServer()
+    started = time.time()
+    try:
+        await server.serve_forever()
+    finally:
+        print(f"Daemon stopped after {time.time() - started:.0f}s")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
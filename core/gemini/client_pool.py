@@ -0,0 +1,151 @@
+import hashlib
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from google import genai
+from google.genai import errors
+from settings import settings
+
+
+@dataclass
+class PooledClient:
+    name: str
+    client: genai.Client
+    weight: float = 1.0
+    outstanding: int = 0
+    consecutive_failures: int = 0
+    throttled_until: float = 0.0
+    vertexai: bool = False
+
+    def available(self, now: float) -> bool:
+        return now >= self.throttled_until
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """
+    Return True if an exception is a quota / rate-limit rejection (HTTP 429).
+    """
+    return isinstance(error, errors.APIError) and (error.code == 429 or error.status == "RESOURCE_EXHAUSTED")
+
+
+class ClientPool:
+    """
+    Spread Gemini traffic over several API keys and/or Vertex AI projects.
+
+    Requests go to the healthy client with the fewest outstanding requests relative
+    to its weight. A client that answers 429, or fails CLIENT_POOL_MAX_FAILURES times
+    in a row, is taken out of rotation for CLIENT_POOL_COOLDOWN_SECONDS. Requests with
+    an affinity key (for cached content, uploaded files or long-running operations)
+    always go to the same client, chosen by rendezvous hashing so the mapping is stable
+    across restarts as long as the configured keys do not change. Work that needs the
+    Files API (Veo generations, whose results are downloaded from a Files-API URI) is
+    pinned among the API-key members only, since Vertex AI clients have no Files API.
+    """
+
+    def __init__(self, clients: list[PooledClient], cooldown_seconds: float = None, max_failures: int = None):
+        """
+        Args:
+            clients (list[PooledClient]): The pool members; at least one is required.
+            cooldown_seconds (float): How long an unhealthy client sits out. Defaults to CLIENT_POOL_COOLDOWN_SECONDS.
+            max_failures (int): Consecutive non-429 failures before a client sits out. Defaults to CLIENT_POOL_MAX_FAILURES.
+        """
+        if not clients:
+            raise ValueError("A client pool needs at least one API key or project")
+        self.clients = clients
+        self.cooldown_seconds = cooldown_seconds or settings.CLIENT_POOL_COOLDOWN_SECONDS
+        self.max_failures = max_failures or settings.CLIENT_POOL_MAX_FAILURES
+
+    @classmethod
+    def from_settings(cls) -> "ClientPool":
+        """
+        Build the pool from GOOGLE_API_KEY, GOOGLE_API_KEYS and GOOGLE_CLOUD_PROJECTS.
+        CLIENT_POOL_WEIGHTS optionally gives one weight per member, in that order.
+        """
+        keys = list(dict.fromkeys([settings.GOOGLE_API_KEY, *settings.GOOGLE_API_KEYS]))
+        members = [(f"key:...{key[-4:]}", genai.Client(api_key=key), False) for key in keys if key]
+        members += [
+            (f"project:{project}", genai.Client(vertexai=True, project=project, location=settings.GOOGLE_CLOUD_LOCATION), True)
+            for project in settings.GOOGLE_CLOUD_PROJECTS
+        ]
+        weights = settings.CLIENT_POOL_WEIGHTS
+        if weights and len(weights) != len(members):
+            raise ValueError(f"CLIENT_POOL_WEIGHTS has {len(weights)} entries for {len(members)} clients")
+        return cls([
+            PooledClient(name=name, client=client, weight=weights[n] if weights else 1.0, vertexai=vertexai)
+            for n, (name, client, vertexai) in enumerate(members)
+        ])
+
+    def owner(self, affinity: str, require_files_api: bool = False) -> PooledClient:
+        """
+        Return the client that owns resources created under an affinity key.
+
+        Args:
+            affinity (str): The affinity key.
+            require_files_api (bool): Only consider API-key members, which can download from the Files API.
+        """
+        candidates = [member for member in self.clients if not (require_files_api and member.vertexai)]
+        if not candidates:
+            raise ValueError("This request needs the Files API, which requires at least one Gemini API key")
+
+        def score(member: PooledClient) -> int:
+            digest = hashlib.sha256(f"{member.name}|{affinity}".encode()).digest()
+            return int.from_bytes(digest[:8], "big")
+        return max(candidates, key=score)
+
+    def select(self, affinity: str = None, require_files_api: bool = False) -> PooledClient:
+        """
+        Pick the client for the next request.
+
+        Args:
+            affinity (str): Optional key pinning the request to the client that owns it.
+            require_files_api (bool): Only consider API-key members, which can download from the Files API.
+
+        Returns:
+            PooledClient: The chosen client.
+        """
+        if affinity is not None:
+            return self.owner(affinity, require_files_api)
+        now = time.monotonic()
+        candidates = [member for member in self.clients if not (require_files_api and member.vertexai)]
+        if not candidates:
+            raise ValueError("This request needs the Files API, which requires at least one Gemini API key")
+        healthy = [member for member in candidates if member.available(now)]
+        if not healthy:
+            # Everyone is cooling down: use whoever comes back first rather than failing outright.
+            return min(candidates, key=lambda member: member.throttled_until)
+        return min(healthy, key=lambda member: (member.outstanding + 1) / member.weight)
+
+    @asynccontextmanager
+    async def acquire(self, affinity: str = None, require_files_api: bool = False):
+        """
+        Borrow a genai.Client for one request and record how the request went.
+
+        Args:
+            affinity (str): Optional key pinning the request to the client that owns it.
+            require_files_api (bool): Only consider API-key members, which can download from the Files API.
+
+        Yields:
+            genai.Client: The client to use.
+        """
+        member = self.select(affinity, require_files_api)
+        member.outstanding += 1
+        try:
+            yield member.client
+        except Exception as e:
+            self._record_failure(member, e)
+            raise
+        else:
+            member.consecutive_failures = 0
+        finally:
+            member.outstanding -= 1
+
+    def _record_failure(self, member: PooledClient, error: Exception) -> None:
+        if is_rate_limited(error):
+            member.throttled_until = time.monotonic() + self.cooldown_seconds
+            print(f"⚠️ {member.name} is rate limited, taking it out of rotation for {self.cooldown_seconds:.0f}s")
+            return
+        member.consecutive_failures += 1
+        if member.consecutive_failures >= self.max_failures:
+            member.consecutive_failures = 0
+            member.throttled_until = time.monotonic() + self.cooldown_seconds
+            print(f"⚠️ {member.name} failed {self.max_failures} times in a row, taking it out of rotation")
@@ -1,13 +1,25 @@
 import base64
-import io
 import json
 import asyncio
-import time
+import math
+import os
+from collections import OrderedDict
 from PIL import Image
-from google import genai
 from google.genai import types
 from pydantic import BaseModel
 from settings import settings  # Ensure this file defines GOOGLE_API_KEY, TEMPERATURE, MAX_TOKENS
+from core.io_handling import io_executor
+from core.image_handling.boxes import BoxArray
+from core.image_handling import perceptual_hash
+from core.image_handling.perceptual_hash import PerceptualHashIndex
+from core.gemini.model_registry import ModelRegistry, ModelRole
+from core.gemini.model_router import ModelRouter
+from core.gemini.client_pool import ClientPool
+from core.gemini.responses import GenerationResult, parse_response
+from core.video_handling.veo_jobs import VeoJobPoller
+from core.video_handling import video_analysis
+from core.video_handling import video_operations
+from core.video_handling.video_analysis import VideoTrack
 
 class BaseResponse(BaseModel):
     response: str
@@ -15,16 +27,56 @@ class BaseResponse(BaseModel):
 class ImagePromptResponse(BaseModel):
     image_prompt: str
 
+class DetectedObject(BaseModel):
+    label: str
+    confidence: float
+    box_2d: list[int]  # [ymin, xmin, ymax, xmax] normalized to 0-1000
+
+class DetectedObjects(BaseModel):
+    objects: list[DetectedObject]
+
+class Shot(BaseModel):
+    prompt: str
+    duration_seconds: int
+
+class Storyboard(BaseModel):
+    style: str  # shared look (palette, lighting, lens, product details) repeated in every shot prompt
+    shots: list[Shot]
+
 class GeminiAsyncClient:
     def __init__(self):
-        self.client = genai.Client(api_key=settings.GOOGLE_API_KEY)
+        self.pool = ClientPool.from_settings()
+        self.models = ModelRegistry.from_settings()
+        self.router = ModelRouter(self.models)
+        self.video_jobs = VeoJobPoller(self.pool)
+        self.semaphore = asyncio.Semaphore(settings.MAX_CONCURRENCE_CALLS)
+        self.hash_indexes: OrderedDict[str, PerceptualHashIndex] = OrderedDict()
+
+    async def _generate_content(self, task: str, affinity: str = None, **kwargs) -> types.GenerateContentResponse:
+        """
+        Call generate_content with the model the router picks for this task on the
+        least-loaded pooled client, recording latency and errors for future routing decisions.
+        Pass affinity to pin the call to the client that owns referenced cached content or files.
+        """
+        model = self.router.select(task)
+        async with self.router.track(model, task), self.pool.acquire(affinity) as client:
+            return await client.aio.models.generate_content(model=model, **kwargs)
+
+    async def resume_video_jobs(self) -> int:
+        """
+        Resume polling and downloading Veo generations left pending by a previous run.
+
+        Returns:
+            int: The number of pending video jobs found.
+        """
+        return await self.video_jobs.resume()
 
     async def raw_ainvoke(self, prompt: str) -> str:
         """
         Invoke the Gemini model asynchronously with the given text prompt.
         """
-        response = await self.client.aio.models.generate_content(
-            model=settings.GOOGLE_FAST_MODEL,
+        response = await self._generate_content(
+            task="text",
             contents=prompt,
             config=types.GenerateContentConfig(
                 temperature=settings.TEMPERATURE,
@@ -37,8 +89,8 @@ class GeminiAsyncClient:
         """
         Invoke the Gemini model asynchronously with the given text prompt.
         """
-        response = await self.client.aio.models.generate_content(
-            model=settings.GOOGLE_FAST_MODEL,
+        response = await self._generate_content(
+            task="text",
             contents=prompt,
             config=types.GenerateContentConfig(
                 temperature=settings.TEMPERATURE,
@@ -49,22 +101,32 @@ class GeminiAsyncClient:
         )
         return response.parsed
 
-    async def describe_image(self, image_path: str) -> str:
+    @staticmethod
+    async def _load_image_bytes(image_path: str | bytes) -> bytes:
         """
-        Describe an image using the Gemini Pro model with a fixed prompt.
+        Return the encoded bytes of an image given either its path or the bytes themselves.
         """
+        if isinstance(image_path, (bytes, bytearray, memoryview)):
+            return bytes(image_path)
         try:
-            print(f"Describing image at {image_path}")
-            with open(image_path, "rb") as f:
-                image_bytes = f.read()
+            return await io_executor.read_bytes(image_path)
         except Exception as e:
             raise ValueError(f"Could not read image at {image_path}: {e}")
 
+    async def describe_image(self, image_path: str | bytes) -> str:
+        """
+        Describe an image using the Gemini Pro model with a fixed prompt.
+        The image may be given as a file path or as encoded image bytes.
+        """
+        if isinstance(image_path, str):
+            print(f"Describing image at {image_path}")
+        image_bytes = await self._load_image_bytes(image_path)
+
         image_part = types.Part.from_bytes(data=image_bytes, mime_type="image/jpeg")
         contents = [types.UserContent(parts=[types.Part.from_text(text="Describe this image"), image_part])]
 
-        response = await self.client.aio.models.generate_content(
-            model=settings.GOOGLE_FAST_MODEL,
+        response = await self._generate_content(
+            task="describe",
             contents=contents,
             config=types.GenerateContentConfig(
                 temperature=settings.TEMPERATURE,
@@ -82,10 +144,17 @@ class GeminiAsyncClient:
         """
         Create an image using the Gemini model based on the provided prompt.
         """
+        return await (await self.create_image_result(prompt)).decode_image()
+
+    async def create_image_result(self, prompt: str) -> GenerationResult:
+        """
+        Like create_image, but return the whole reply: the model's text, every inline
+        image (still encoded, so it can be written to disk without re-encoding) and token usage.
+        """
         contents = [types.UserContent(parts=[types.Part.from_text(text=" - Create the following image based on the following prompt: " + prompt)])]
         try:
-            response = await self.client.aio.models.generate_content(
-                model=settings.GOOGLE_IMAGE_GENERATION_MODEL,
+            response = await self._generate_content(
+                task="image_generation",
                 contents=contents,
                 config=types.GenerateContentConfig(
                     temperature=settings.TEMPERATURE,
@@ -115,54 +184,168 @@ class GeminiAsyncClient:
                     ]
                 )
             )
-
-            print(response)
         except Exception as e:
             raise RuntimeError(f"Image generation failed: {e}")
-        
-        if not response or not response.candidates:
-            raise ValueError("No candidates received from Gemini model for image generation.")
 
-        for part in response.candidates[0].content.parts:
-            if part.inline_data is not None:
-                try:
-                    return Image.open(io.BytesIO(part.inline_data.data))
-                except Exception:
-                    continue
-        raise ValueError("No valid image data received from Gemini model.")
+        return parse_response(response)
 
-    async def generate_video_from_prompt(self, prompt: str, filename: str = "output_video.mp4"):
+    async def create_image_variants(self, prompt: str, count: int = 4, aspect_ratio: str = "1:1") -> list[Image.Image]:
+        """
+        Create several candidate images for the same prompt with as few round trips as possible.
+
+        Args:
+            prompt (str): The image generation prompt.
+            count (int): Number of variants to generate.
+            aspect_ratio (str): Imagen aspect ratio such as "1:1", "16:9" or "9:16".
+
+        Returns:
+            list[Image.Image]: The decoded variants, in completion order.
+        """
+        return [image async for image in self.stream_image_variants(prompt, count, aspect_ratio)]
+
+    async def stream_image_variants(self, prompt: str, count: int = 4, aspect_ratio: str = "1:1"):
+        """
+        Yield candidate images for a prompt as soon as each request completes.
+
+        Each request asks Imagen for up to IMAGEN_MAX_IMAGES_PER_REQUEST images; when
+        more are wanted the extra requests are sent concurrently instead of one after another.
+
+        Args:
+            prompt (str): The image generation prompt.
+            count (int): Number of variants to generate.
+            aspect_ratio (str): Imagen aspect ratio such as "1:1", "16:9" or "9:16".
+
+        Yields:
+            Image.Image: Decoded variants, in completion order.
+        """
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        per_request = settings.IMAGEN_MAX_IMAGES_PER_REQUEST
+        batch_sizes = [min(per_request, count - start) for start in range(0, count, per_request)]
+        tasks = [asyncio.ensure_future(self._generate_imagen_batch(prompt, size, aspect_ratio)) for size in batch_sizes]
+        try:
+            for next_batch in asyncio.as_completed(tasks):
+                for image in await next_batch:
+                    yield image
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _generate_imagen_batch(self, prompt: str, number_of_images: int, aspect_ratio: str) -> list[Image.Image]:
+        async with self.semaphore:
+            try:
+                async with self.pool.acquire() as client:
+                    response = await client.aio.models.generate_images(
+                        model=self.models[ModelRole.IMAGEN],
+                        prompt=prompt,
+                        config=types.GenerateImagesConfig(
+                            aspect_ratio=aspect_ratio,
+                            number_of_images=number_of_images
+                        )
+                    )
+            except Exception as e:
+                raise RuntimeError(f"Image variant generation failed: {e}")
+
+        if not response or not response.generated_images:
+            raise ValueError("No images received from Imagen model for variant generation.")
+
+        return await asyncio.gather(*(
+            io_executor.decode_image(generated.image.image_bytes) for generated in response.generated_images
+        ))
+
+    async def generate_video_from_prompt(self, prompt: str, filename: str = "output_video.mp4", duration_seconds: int = None):
         """
         Generate a video using the Veo 2 model from a text prompt and save it locally.
 
         Args:
             prompt (str): The description of the scene to generate.
             filename (str): The filename for the saved video.
+            duration_seconds (int): Optional clip length; the model default is used when omitted.
+
+        Returns:
+            list[str]: Paths of the saved videos.
         """
         try:
-            operation = self.client.models.generate_videos(
-                model="veo-2.0-generate-001",
-                prompt=prompt,
-                config=types.GenerateVideosConfig(
-                    person_generation="allow_adult",  # "dont_allow" or "allow_adult"
-                    aspect_ratio="16:9",  # "16:9" or "9:16"
-                ),
-            )
-
-            while not operation.done:
-                time.sleep(5)
-                operation = self.client.operations.get(operation)
+            # Pinned by filename, so the poller (even after a restart) asks the key that owns the operation.
+            async with self.pool.acquire(affinity=filename, require_files_api=True) as client:
+                operation = await client.aio.models.generate_videos(
+                    model=self.models[ModelRole.VIDEO_GENERATION],
+                    prompt=prompt,
+                    config=types.GenerateVideosConfig(
+                        person_generation="allow_adult",  # "dont_allow" or "allow_adult"
+                        aspect_ratio="16:9",  # "16:9" or "9:16"
+                        duration_seconds=duration_seconds,
+                    ),
+                )
 
-            response = operation.response   
-            for n, sample in enumerate(response['generateVideoResponse']['generatedSamples']):
-                video_uri = sample['video']['uri']
-                video_data = self.client.files.download(file=video_uri)
-                with open(f"{filename}_{n}.mp4", "wb") as video_file:
-                    video_file.write(video_data)
+            # The job is persisted before polling, so an interrupted run resumes instead of resubmitting.
+            return await self.video_jobs.submit(operation, prompt, filename)
 
         except Exception as e:
             raise RuntimeError(f"⚠️ Error al generar el video: {e}")
         
+    async def plan_storyboard(self, ad_strategy: str, total_seconds: int = None) -> Storyboard:
+        """
+        Split an ad strategy into consecutive shots that each fit in one Veo clip.
+
+        Args:
+            ad_strategy (str): The ad storytelling plan.
+            total_seconds (int): Target length of the whole ad. Defaults to STORYBOARD_TOTAL_SECONDS.
+
+        Returns:
+            Storyboard: A shared visual style and the shots in playback order.
+        """
+        total_seconds = total_seconds or settings.STORYBOARD_TOTAL_SECONDS
+        shot_count = min(math.ceil(total_seconds / settings.VEO_MAX_SHOT_SECONDS), settings.STORYBOARD_MAX_SHOTS)
+        prompt = (
+            f"Split this ad strategy into exactly {shot_count} consecutive shots for an AI video generator, "
+            f"about {total_seconds} seconds in total. Each shot lasts between {settings.VEO_MIN_SHOT_SECONDS} and "
+            f"{settings.VEO_MAX_SHOT_SECONDS} seconds and is generated independently, so its prompt must be fully "
+            f"self-contained: describe the subject, setting, camera movement and action without referring to other shots. "
+            f"Also describe one shared visual style (palette, lighting, lens, product appearance) so the shots cut together "
+            f"seamlessly.\n\nAd strategy: {ad_strategy}"
+        )
+        storyboard = await self.ainvoke(prompt, Storyboard)
+        if not storyboard.shots:
+            raise ValueError("The storyboard has no shots")
+        storyboard.shots = storyboard.shots[:settings.STORYBOARD_MAX_SHOTS]
+        for shot in storyboard.shots:
+            shot.duration_seconds = max(settings.VEO_MIN_SHOT_SECONDS, min(shot.duration_seconds, settings.VEO_MAX_SHOT_SECONDS))
+        return storyboard
+
+    async def generate_storyboard_video(self, ad_strategy: str, filename: str = "output_video.mp4",
+                                        total_seconds: int = None) -> str:
+        """
+        Generate a long-form video as a storyboard of Veo shots and join them into one file.
+
+        Every shot is submitted at once and the shared job poller downloads them as they
+        finish, so the wall time is close to that of a single clip rather than the sum of all.
+
+        Args:
+            ad_strategy (str): The ad storytelling plan.
+            filename (str): Path of the joined video.
+            total_seconds (int): Target length of the whole ad. Defaults to STORYBOARD_TOTAL_SECONDS.
+
+        Returns:
+            str: The path of the joined video.
+        """
+        storyboard = await self.plan_storyboard(ad_strategy, total_seconds)
+        stem = os.path.splitext(filename)[0]
+        print(f"🎞️ Storyboard with {len(storyboard.shots)} shots, generating them concurrently...")
+
+        results = await asyncio.gather(*(
+            self.generate_video_from_prompt(f"{storyboard.style}\n\n{shot.prompt}", f"{stem}_shot{n:02d}",
+                                            duration_seconds=shot.duration_seconds)
+            for n, shot in enumerate(storyboard.shots)
+        ), return_exceptions=True)
+
+        failures = [f"shot {n}: {result}" for n, result in enumerate(results) if isinstance(result, BaseException)]
+        if failures:
+            raise RuntimeError(f"⚠️ {len(failures)} of {len(results)} storyboard shots failed: {'; '.join(failures)}")
+        # A shot finished by another process is settled from the job store without paths; its file name is known.
+        clips = [paths[0] if paths else f"{stem}_shot{n:02d}_0.mp4" for n, paths in enumerate(results)]
+        return await video_operations.concat_videos(clips, filename)
+
     async def generate_video_from_image(self, image_path: str, prompt: str, filename: str = "output_video", skip_image_creation: bool = False):
         """
         Generate a video using the Veo 2 model from an image and a text prompt, and save it locally.
@@ -172,32 +355,31 @@ class GeminiAsyncClient:
             prompt (str): Description of the scene to generate.
             filename (str): Base name for the saved video file.
             skip_image_creation (bool): If true, skip initial image creation and use provided image_path.
+
+        Returns:
+            list[str]: Paths of the saved videos.
         """
         image = None
         try:
             if not skip_image_creation:
                 # Generate an initial image based on the prompt
-                imagen = self.client.models.generate_images(
-                    model="imagen-3.0-generate-002",
-                    prompt=prompt,
-                    config=types.GenerateImagesConfig(
-                        aspect_ratio="16:9",
-                        number_of_images=1
+                async with self.pool.acquire() as client:
+                    imagen = await client.aio.models.generate_images(
+                        model=self.models[ModelRole.IMAGEN],
+                        prompt=prompt,
+                        config=types.GenerateImagesConfig(
+                            aspect_ratio="16:9",
+                            number_of_images=1
+                        )
                     )
-                )
                 image = imagen.generated_images[0]
 
                 # Save the generated image to the specified path
-                with open(image_path, "wb") as f:
-                    f.write(image.image.image_bytes)
+                await io_executor.write_bytes(image_path, image.image.image_bytes)
             else:
                 try:
-                    from PIL import Image
-                    with open(image_path, 'rb') as f:
-                        image_pil = Image.open(f)
-                        image_bytes = io.BytesIO()
-                        image_pil.save(image_bytes, format=image_pil.format)
-                        image_bytes = image_bytes.getvalue()
+                    image_pil = await io_executor.open_image(image_path)
+                    image_bytes = await io_executor.encode_image(image_pil, image_pil.format)
                     
                     class MockImage: # Mock class to mimic the structure of generated image when skipping creation
                         def __init__(self, image_bytes, mime_type):
@@ -226,8 +408,8 @@ class GeminiAsyncClient:
             # Create the image part using from_bytes
             image_part = types.Part.from_bytes(data=image.image.image_bytes, mime_type="image/jpeg")
 
-            augmentation_response = await self.client.aio.models.generate_content(
-                model="gemini-2.0-flash",
+            augmentation_response = await self._generate_content(
+                task="augment",
                 contents=[types.UserContent(parts=[types.Part.from_text(text=f"{augmentation_prompt_instruction} , Here is the prompt to augment, this prompt is a product prompt, and in the image is the product, so taking in account the image and the prompt, please enhance the prompt and create a very good prompt for a video to show this product and go viral: {prompt}"), image_part])],
             )
 
@@ -245,27 +427,19 @@ class GeminiAsyncClient:
         try:
             video_image = image.image
 
-            operation = self.client.models.generate_videos(
-                model=settings.GOOGLE_VIDEO_GENERATION_MODEL,
-                prompt=augmented_prompt, # Use augmented prompt here
-                image=video_image,
-                config=types.GenerateVideosConfig(
-                    aspect_ratio="9:16",              # Use "16:9" or "9:16"
-                    number_of_videos=1,
-                    duration_seconds=8
+            async with self.pool.acquire(affinity=filename, require_files_api=True) as client:
+                operation = await client.aio.models.generate_videos(
+                    model=self.models[ModelRole.VIDEO_GENERATION],
+                    prompt=augmented_prompt, # Use augmented prompt here
+                    image=video_image,
+                    config=types.GenerateVideosConfig(
+                        aspect_ratio="9:16",              # Use "16:9" or "9:16"
+                        number_of_videos=1,
+                        duration_seconds=settings.VEO_MAX_SHOT_SECONDS
+                    )
                 )
-            )
 
-            while not operation.done:
-                time.sleep(20)
-                operation = self.client.operations.get(operation)
-
-            response = operation.response   
-            for n, sample in enumerate(response['generateVideoResponse']['generatedSamples']):
-                video_uri = sample['video']['uri']
-                video_data = self.client.files.download(file=video_uri)
-                with open(f"{filename}_{n}.mp4", "wb") as video_file:
-                    video_file.write(video_data)
+            return await self.video_jobs.submit(operation, augmented_prompt, filename)
 
         except Exception as e:
             raise RuntimeError(f"⚠️ Error generating video from image: {e}")
@@ -274,103 +448,77 @@ class GeminiAsyncClient:
         """
         Modify an existing image using the Gemini model based on the provided prompt.
         """
+        return await (await self.edit_image_result(image_path, prompt)).decode_image()
+
+    async def edit_image_result(self, image_path: str, prompt: str) -> GenerationResult:
+        """
+        Like edit_image, but return the whole reply as a GenerationResult.
+        """
         try:
-            image = Image.open(image_path)
-            with io.BytesIO() as img_buffer:
-                image.save(img_buffer, format=image.format)
-                img_bytes = img_buffer.getvalue()
+            image = await io_executor.open_image(image_path)
+            img_bytes = await io_executor.encode_image(image, image.format)
             mime_type = f"image/{image.format.lower()}"
             image_part = types.Part.from_bytes(data=img_bytes, mime_type=mime_type)
             contents = [types.UserContent(parts=[types.Part.from_text(text=prompt), image_part])]
 
-            response = await self.client.aio.models.generate_content(
-                model=settings.GOOGLE_IMAGE_GENERATION_MODEL,
+            response = await self._generate_content(
+                task="image_generation",
                 contents=contents,
                 config=types.GenerateContentConfig(response_modalities=['Text', 'Image'])
             )
         except Exception as e:
             raise RuntimeError(f"Image modification failed: {e}")
 
-        if not response or not response.candidates or not response.candidates[0].content.parts:
-            raise ValueError("No candidates received from Gemini model for image modification.")
-
-        for part in response.candidates[0].content.parts:
-            if part.inline_data is not None:
-                try:
-                    return Image.open(io.BytesIO(part.inline_data.data))
-                except Exception:
-                    continue
-        raise ValueError("No valid modified image data received from Gemini model.")
+        return parse_response(response)
 
-    async def get_bounding_objects(self, image_path: str, object_prompt: str = None) -> list:
+    async def get_bounding_objects(self, image_path: str | bytes, object_prompt: str = None) -> BoxArray:
         """
-        Return a list of bounding box coordinates for objects detected in the image.
+        Detect objects in the image and return their labeled bounding boxes.
         The Gemini API returns normalized coordinates on a 1000x1000 scale.
-        
+
+        Detection uses structured output, so the model answers with labels, confidences
+        and [ymin, xmin, ymax, xmax] boxes that are validated against DetectedObjects
+        instead of being scraped from free text.
+
         Args:
-            image_path (str): File path to the image.
-            object_prompt (str): Optional custom prompt. By default, a prompt is used to return
-                                 bounding boxes in [ymin, xmin, ymax, xmax] format.
-                                 
+            image_path (str | bytes): File path to the image, or the encoded image bytes.
+            object_prompt (str): Optional custom prompt. By default, every object in the image is requested.
+
         Returns:
-            list: A list of bounding boxes. Each bounding box is a dictionary with keys:
-                  'ymin', 'xmin', 'ymax', 'xmax'.
+            BoxArray: The detected boxes, labels and confidences.
         """
-        object_prompt = (
-            "Return a bounding box for each of the objects in this image "
-            "in [ymin, xmin, ymax, xmax] format."
-        )
-        try:
-            with open(image_path, "rb") as f:
-                image_bytes = f.read()
-        except Exception as e:
-            raise ValueError(f"Could not read image at {image_path}: {e}")
+        if object_prompt is None:
+            object_prompt = (
+                "Detect each of the objects in this image. For every object return a descriptive label, "
+                "your confidence between 0 and 1, and its bounding box in [ymin, xmin, ymax, xmax] format "
+                "normalized to 0-1000."
+            )
+        image_bytes = await self._load_image_bytes(image_path)
 
         image_part = types.Part.from_bytes(data=image_bytes, mime_type="image/jpeg")
         contents = [types.UserContent(parts=[types.Part.from_text(text=object_prompt), image_part])]
 
-        response = await self.client.aio.models.generate_content(
-            model=settings.GOOGLE_PRO_MODEL,
+        response = await self._generate_content(
+            task="detect",
             contents=contents,
             config=types.GenerateContentConfig(
                 temperature=settings.TEMPERATURE,
                 max_output_tokens=settings.MAX_TOKENS,
+                response_mime_type="application/json",
+                response_schema=DetectedObjects,
             )
         )
-        
-        if not response.text:
-            raise ValueError("No text response received for bounding boxes.")
 
-        try:
-            boxes = json.loads(response.text)
-            formatted_boxes = []
-            for box in boxes:
-                if isinstance(box, list) and len(box) == 4:
-                    formatted_boxes.append({
-                        "ymin": box[0],
-                        "xmin": box[1],
-                        "ymax": box[2],
-                        "xmax": box[3],
-                    })
-            return formatted_boxes
-        except json.JSONDecodeError:
-            lines = response.text.strip().splitlines()
-            formatted_boxes = []
-            for line in lines:
-                try:
-                    parts = [float(p) for p in line.strip("[]").split(",")]
-                    if len(parts) == 4:
-                        formatted_boxes.append({
-                            "ymin": parts[0],
-                            "xmin": parts[1],
-                            "ymax": parts[2],
-                            "xmax": parts[3],
-                        })
-                except Exception:
-                    continue
-            if formatted_boxes:
-                return formatted_boxes
-            raise ValueError("Failed to parse bounding boxes from response.")
+        detections = response.parsed
+        if detections is None:
+            if not response.text:
+                raise ValueError("No response received for bounding boxes.")
+            try:
+                detections = DetectedObjects.model_validate_json(response.text)
+            except ValueError as e:
+                raise ValueError(f"Failed to parse bounding boxes from response: {e}")
+
+        return BoxArray.from_detections(detections.objects)
 
     @staticmethod
     def convert_normalized_box(norm_box: dict, original_width: int, original_height: int) -> dict:
@@ -394,12 +542,12 @@ class GeminiAsyncClient:
             "xmax": int((norm_box["xmax"] / 1000) * original_width),
         }
 
-    async def get_segmentation(self, image_path: str, prompt: str = None) -> list:
+    async def get_segmentation(self, image_path: str | bytes, prompt: str = None) -> list:
         """
         Generate segmentation masks for an image.
         
         Args:
-            image_path (str): Path to the image.
+            image_path (str | bytes): Path to the image, or the encoded image bytes.
             prompt (str): Optional prompt to customize segmentation (if not provided,
                           a default prompt is used).
         
@@ -416,17 +564,13 @@ class GeminiAsyncClient:
                 "bounding box in the key 'box_2d', the segmentation mask in key 'mask', and "
                 "the text label in the key 'label'. Use descriptive labels."
             )
-        try:
-            with open(image_path, "rb") as f:
-                image_bytes = f.read()
-        except Exception as e:
-            raise ValueError(f"Could not read image at {image_path}: {e}")
+        image_bytes = await self._load_image_bytes(image_path)
 
         image_part = types.Part.from_bytes(data=image_bytes, mime_type="image/jpeg")
         contents = [types.UserContent(parts=[types.Part.from_text(text=prompt), image_part])]
 
-        response = await self.client.aio.models.generate_content(
-            model=settings.GOOGLE_PRO_MODEL,
+        response = await self._generate_content(
+            task="segment",
             contents=contents,
             config=types.GenerateContentConfig(
                 temperature=settings.TEMPERATURE,
@@ -443,6 +587,148 @@ class GeminiAsyncClient:
         except json.JSONDecodeError as e:
             raise ValueError(f"Failed to parse segmentation JSON from response: {e}")
 
+    async def describe_images(self, image_paths: list[str | bytes], similarity_threshold: float = None) -> list[str]:
+        """
+        Describe a batch of images, reusing the description of near-duplicate shots.
+
+        Args:
+            image_paths (list[str | bytes]): Paths (or encoded bytes) of the images to describe.
+            similarity_threshold (float): Perceptual similarity in [0, 1] above which an image
+                                          reuses an existing result. Defaults to PHASH_SIMILARITY_THRESHOLD.
+
+        Returns:
+            list[str]: One description per input path, in order.
+        """
+        return await self._analyze_batch("describe", image_paths, self.describe_image, similarity_threshold)
+
+    async def get_bounding_objects_batch(self, image_paths: list[str | bytes], object_prompt: str = None,
+                                         similarity_threshold: float = None) -> list[BoxArray]:
+        """
+        Detect objects in a batch of images, reusing the boxes of near-duplicate shots.
+
+        Args:
+            image_paths (list[str | bytes]): Paths (or encoded bytes) of the images.
+            object_prompt (str): Optional custom detection prompt.
+            similarity_threshold (float): Perceptual similarity in [0, 1] above which an image
+                                          reuses an existing result. Defaults to PHASH_SIMILARITY_THRESHOLD.
+
+        Returns:
+            list[BoxArray]: One BoxArray per input path, in order.
+        """
+        async def analyze(image_path):
+            return await self.get_bounding_objects(image_path, object_prompt)
+        return await self._analyze_batch(f"boxes:{object_prompt}", image_paths, analyze, similarity_threshold)
+
+    async def get_segmentations(self, image_paths: list[str | bytes], prompt: str = None,
+                                similarity_threshold: float = None) -> list[list]:
+        """
+        Segment a batch of images, reusing the masks of near-duplicate shots.
+
+        Args:
+            image_paths (list[str | bytes]): Paths (or encoded bytes) of the images.
+            prompt (str): Optional custom segmentation prompt.
+            similarity_threshold (float): Perceptual similarity in [0, 1] above which an image
+                                          reuses an existing result. Defaults to PHASH_SIMILARITY_THRESHOLD.
+
+        Returns:
+            list[list]: One segmentation list per input path, in order.
+        """
+        async def analyze(image_path):
+            return await self.get_segmentation(image_path, prompt)
+        return await self._analyze_batch(f"segmentation:{prompt}", image_paths, analyze, similarity_threshold)
+
+    async def describe_video(self, video_path: str, sample_fps: float = None, scene_threshold: float = None) -> VideoTrack:
+        """
+        Describe a video scene by scene.
+
+        Frames are streamed from the file, near-identical frames are skipped with a
+        histogram scene-change test, and the remaining keyframes go through
+        describe_images in concurrent batches.
+
+        Args:
+            video_path (str): Path to the video.
+            sample_fps (float): Frames per second to sample. Defaults to VIDEO_SAMPLE_FPS.
+            scene_threshold (float): Scene-change distance in [0, 1]. Defaults to VIDEO_SCENE_THRESHOLD.
+
+        Returns:
+            VideoTrack: Descriptions indexed by keyframe timestamp.
+        """
+        return await video_analysis.analyze_video(video_path, self.describe_images, sample_fps, scene_threshold)
+
+    async def detect_in_video(self, video_path: str, object_prompt: str = None, sample_fps: float = None,
+                              scene_threshold: float = None) -> VideoTrack:
+        """
+        Detect objects across a video scene by scene.
+
+        Args:
+            video_path (str): Path to the video.
+            object_prompt (str): Optional custom detection prompt.
+            sample_fps (float): Frames per second to sample. Defaults to VIDEO_SAMPLE_FPS.
+            scene_threshold (float): Scene-change distance in [0, 1]. Defaults to VIDEO_SCENE_THRESHOLD.
+
+        Returns:
+            VideoTrack: BoxArray detections indexed by keyframe timestamp.
+        """
+        async def analyze_batch(frames):
+            return await self.get_bounding_objects_batch(frames, object_prompt)
+        return await video_analysis.analyze_video(video_path, analyze_batch, sample_fps, scene_threshold)
+
+    def _hash_index(self, key: str) -> PerceptualHashIndex:
+        # Keys include free-form prompts, so both the number of indexes and their sizes are LRU-bounded.
+        if key in self.hash_indexes:
+            self.hash_indexes.move_to_end(key)
+            return self.hash_indexes[key]
+        index = self.hash_indexes[key] = PerceptualHashIndex(max_size=settings.PHASH_INDEX_MAX_SIZE)
+        while len(self.hash_indexes) > settings.PHASH_MAX_INDEXES:
+            self.hash_indexes.popitem(last=False)
+        return index
+
+    async def _analyze_batch(self, key: str, image_paths: list[str | bytes], analyze, similarity_threshold: float = None) -> list:
+        """
+        Run analyze over image_paths, calling the API once per group of near-duplicates.
+
+        Images are perceptually hashed on the I/O pool. An image whose hash is close enough
+        to one already analyzed (in this batch or an earlier one with the same key) reuses
+        that result; the remaining representatives are analyzed concurrently.
+        """
+        threshold = settings.PHASH_SIMILARITY_THRESHOLD if similarity_threshold is None else similarity_threshold
+        index = self._hash_index(key)
+        hashes = await asyncio.gather(*(
+            io_executor.run_io(perceptual_hash.hash_file, image_path, settings.PHASH_METHOD)
+            for image_path in image_paths
+        ))
+
+        results = [None] * len(image_paths)
+        duplicates = {}
+        representatives = []
+        batch_index = PerceptualHashIndex()
+        for i, image_hash in enumerate(hashes):
+            cached = index.lookup(image_hash, threshold)
+            if cached is not None:
+                results[i] = cached[0]
+                continue
+            match = batch_index.lookup(image_hash, threshold)
+            if match is not None:
+                duplicates[i] = match[0]
+                continue
+            batch_index.add(image_hash, i)
+            representatives.append(i)
+
+        if len(representatives) < len(image_paths):
+            print(f"♻️ Reusing results for {len(image_paths) - len(representatives)} near-duplicate image(s)")
+
+        async def run(i):
+            async with self.semaphore:
+                return await analyze(image_paths[i])
+
+        computed = await asyncio.gather(*(run(i) for i in representatives))
+        for i, result in zip(representatives, computed):
+            results[i] = result
+            index.add(hashes[i], result)
+        for i, owner in duplicates.items():
+            results[i] = results[owner]
+        return results
+
 
 # Example usage of the GeminiAsyncClient class and its functions.
 async def main():
@@ -489,7 +775,7 @@ async def main():
         # Optionally, convert boxes to original pixel coordinates.
         with Image.open("input_image.jpg") as img:
             width, height = img.size
-        pixel_boxes = [client.convert_normalized_box(box, width, height) for box in boxes]
+        pixel_boxes = boxes.to_pixels(width, height)
         print("Bounding boxes (in pixels):", pixel_boxes)
     except Exception as e:
         print("Failed to get bounding boxes:", e)
@@ -0,0 +1,63 @@
+from enum import Enum
+from settings import settings
+
+
+class ModelRole(str, Enum):
+    FAST = "fast"
+    LITE = "lite"
+    PRO = "pro"
+    IMAGE_GENERATION = "image_generation"
+    IMAGEN = "imagen"
+    VIDEO_GENERATION = "video_generation"
+
+
+# Model family prefix every role must use; catches e.g. a Veo name configured as the text model.
+ROLE_PREFIXES = {
+    ModelRole.FAST: "gemini-",
+    ModelRole.LITE: "gemini-",
+    ModelRole.PRO: "gemini-",
+    ModelRole.IMAGE_GENERATION: "gemini-",
+    ModelRole.IMAGEN: "imagen-",
+    ModelRole.VIDEO_GENERATION: "veo-",
+}
+
+
+class ModelRegistry:
+    """
+    The single, validated source of every model name used by the toolkit.
+    """
+
+    def __init__(self, models: dict[ModelRole, str]):
+        """
+        Args:
+            models (dict[ModelRole, str]): Model name for every ModelRole.
+
+        Raises:
+            ValueError: If a role is missing or a name is empty or from the wrong model family.
+        """
+        missing = [role.value for role in ModelRole if role not in models]
+        if missing:
+            raise ValueError(f"No model configured for: {', '.join(missing)}")
+        for role, name in models.items():
+            if not name or name != name.strip():
+                raise ValueError(f"Invalid model name for {role.value}: {name!r}")
+            if not name.startswith(ROLE_PREFIXES[role]):
+                raise ValueError(f"Model {name!r} for {role.value} must start with {ROLE_PREFIXES[role]!r}")
+        self._models = dict(models)
+
+    @classmethod
+    def from_settings(cls) -> "ModelRegistry":
+        return cls({
+            ModelRole.FAST: settings.GOOGLE_FAST_MODEL,
+            ModelRole.LITE: settings.GOOGLE_MODEL,
+            ModelRole.PRO: settings.GOOGLE_PRO_MODEL,
+            ModelRole.IMAGE_GENERATION: settings.GOOGLE_IMAGE_GENERATION_MODEL,
+            ModelRole.IMAGEN: settings.GOOGLE_IMAGEN_MODEL,
+            ModelRole.VIDEO_GENERATION: settings.GOOGLE_VIDEO_GENERATION_MODEL,
+        })
+
+    def __getitem__(self, role: ModelRole) -> str:
+        return self._models[role]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._models.values()
@@ -0,0 +1,147 @@
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from core.gemini.model_registry import ModelRegistry, ModelRole
+from settings import settings
+
+# Task -> (primary role, overflow role or None). Tasks without an overflow always use the primary.
+DEFAULT_ROUTES = {
+    "text": (ModelRole.FAST, ModelRole.LITE),
+    "describe": (ModelRole.FAST, ModelRole.LITE),
+    "augment": (ModelRole.FAST, ModelRole.LITE),
+    "detect": (ModelRole.PRO, None),
+    "segment": (ModelRole.PRO, None),
+    "image_generation": (ModelRole.IMAGE_GENERATION, None),
+}
+
+
+class ModelStats:
+    """
+    Latency and error samples of one model on one task over a sliding time window.
+
+    Samples older than the window expire, so a model that was slow a while ago regains
+    its traffic even if nothing has been sent to it since.
+    """
+
+    def __init__(self, window: int, window_seconds: float):
+        self.samples = deque(maxlen=window)  # (finished at, latency, failed)
+        self.window_seconds = window_seconds
+
+    def record(self, latency: float, failed: bool) -> None:
+        self.samples.append((time.monotonic(), latency, failed))
+
+    def _prune(self) -> None:
+        cutoff = time.monotonic() - self.window_seconds
+        while self.samples and self.samples[0][0] < cutoff:
+            self.samples.popleft()
+
+    def latency(self) -> float:
+        """
+        Return the 90th percentile latency in seconds over the window, or 0 without samples.
+        """
+        self._prune()
+        if not self.samples:
+            return 0.0
+        ordered = sorted(latency for _, latency, _ in self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))]
+
+    def error_rate(self) -> float:
+        self._prune()
+        if not self.samples:
+            return 0.0
+        return sum(failed for _, _, failed in self.samples) / len(self.samples)
+
+
+class ModelRouter:
+    """
+    Pick a model per request from latency SLOs, queue depth and rolling error rate.
+
+    Each task has a primary model and optionally an overflow model. Requests go to the
+    primary until it is under pressure (too many requests in flight, p90 latency above
+    the task's SLO, or error rate above the limit); then they overflow to the other model
+    as long as it is healthier. Latency and errors are tracked per model and task over a
+    sliding time window, and a small probe share of overflowed requests still goes to the
+    primary so its numbers keep reflecting how it performs now.
+    """
+
+    def __init__(self, registry: ModelRegistry, routes: dict = None, latency_slo: float = None,
+                 max_queue_depth: int = None, max_error_rate: float = None, window: int = None,
+                 window_seconds: float = None, probe_rate: float = None):
+        """
+        Args:
+            registry (ModelRegistry): Source of the model names.
+            routes (dict): Task -> (primary role, overflow role or None). Defaults to DEFAULT_ROUTES.
+            latency_slo (float): Target p90 latency in seconds for tasks without their own entry in
+                                 ROUTER_TASK_LATENCY_SLOS. Defaults to ROUTER_LATENCY_SLO.
+            max_queue_depth (int): In-flight requests per model before overflowing. Defaults to ROUTER_MAX_QUEUE_DEPTH.
+            max_error_rate (float): Rolling error rate before overflowing. Defaults to ROUTER_MAX_ERROR_RATE.
+            window (int): Maximum number of recent requests kept per model and task. Defaults to ROUTER_WINDOW.
+            window_seconds (float): Age after which samples expire. Defaults to ROUTER_WINDOW_SECONDS.
+            probe_rate (float): Share of overflowed requests sent to the primary anyway. Defaults to ROUTER_PROBE_RATE.
+        """
+        self.registry = registry
+        self.routes = routes or DEFAULT_ROUTES
+        self.latency_slo = latency_slo or settings.ROUTER_LATENCY_SLO
+        self.max_queue_depth = max_queue_depth or settings.ROUTER_MAX_QUEUE_DEPTH
+        self.max_error_rate = settings.ROUTER_MAX_ERROR_RATE if max_error_rate is None else max_error_rate
+        self.window = window or settings.ROUTER_WINDOW
+        self.window_seconds = window_seconds or settings.ROUTER_WINDOW_SECONDS
+        self.probe_rate = settings.ROUTER_PROBE_RATE if probe_rate is None else probe_rate
+        self._stats: dict[tuple[str, str], ModelStats] = {}
+        self._in_flight: dict[str, int] = {}
+
+    def stats(self, model: str, task: str) -> ModelStats:
+        key = (model, task)
+        if key not in self._stats:
+            self._stats[key] = ModelStats(self.window, self.window_seconds)
+        return self._stats[key]
+
+    def latency_slo_for(self, task: str) -> float:
+        return settings.ROUTER_TASK_LATENCY_SLOS.get(task, self.latency_slo)
+
+    def pressure(self, model: str, task: str) -> float:
+        """
+        Return how loaded a model is for a task relative to its limits; above 1 means over at least one limit.
+        """
+        stats = self.stats(model, task)
+        return max(
+            self._in_flight.get(model, 0) / self.max_queue_depth,
+            stats.latency() / self.latency_slo_for(task),
+            stats.error_rate() / self.max_error_rate if self.max_error_rate else 0.0,
+        )
+
+    def select(self, task: str) -> str:
+        """
+        Return the model name to use for a task right now.
+        """
+        try:
+            primary_role, overflow_role = self.routes[task]
+        except KeyError:
+            raise ValueError(f"No model route for task: {task}")
+        primary = self.registry[primary_role]
+        if not settings.ROUTER_ENABLED or overflow_role is None:
+            return primary
+        primary_pressure = self.pressure(primary, task)
+        if primary_pressure <= 1.0:
+            return primary
+        overflow = self.registry[overflow_role]
+        if self.pressure(overflow, task) >= primary_pressure or random.random() < self.probe_rate:
+            return primary
+        return overflow
+
+    @asynccontextmanager
+    async def track(self, model: str, task: str):
+        """
+        Record the latency and outcome of one request to model for task.
+        """
+        stats = self.stats(model, task)
+        self._in_flight[model] = self._in_flight.get(model, 0) + 1
+        started = time.perf_counter()
+        failed = True
+        try:
+            yield
+            failed = False
+        finally:
+            self._in_flight[model] -= 1
+            stats.record(time.perf_counter() - started, failed)
@@ -0,0 +1,121 @@
+from dataclasses import dataclass, field
+from PIL import Image, UnidentifiedImageError
+from google.genai import types
+from core.io_handling import io_executor
+
+
+@dataclass(slots=True, repr=False)
+class InlineImage:
+    """
+    An image returned inline in a generate_content reply.
+
+    The payload is kept as a memoryview over the bytes the SDK already decoded from
+    base64, so pulling images out of a response copies nothing; pixels are only decoded
+    when decode() is called.
+    """
+    data: memoryview
+    mime_type: str
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes
+
+    def _buffer(self) -> bytes | memoryview:
+        # BytesIO over a bytes object shares its buffer, so hand back the original bytes when the view covers them.
+        source = self.data.obj
+        if isinstance(source, bytes) and len(source) == self.data.nbytes:
+            return source
+        return self.data
+
+    def to_bytes(self) -> bytes:
+        """
+        Return the encoded image bytes, e.g. to write them to disk as they are.
+        """
+        buffer = self._buffer()
+        return buffer if isinstance(buffer, bytes) else buffer.tobytes()
+
+    async def decode(self) -> Image.Image:
+        """
+        Decode the payload into a PIL image on the I/O pool.
+        """
+        return await io_executor.decode_image(self._buffer())
+
+    def __repr__(self) -> str:
+        return f"InlineImage(mime_type={self.mime_type!r}, nbytes={self.nbytes})"
+
+
+@dataclass(slots=True)
+class Usage:
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+    total_tokens: int = 0
+
+    @classmethod
+    def from_metadata(cls, metadata: types.GenerateContentResponseUsageMetadata | None) -> "Usage":
+        if metadata is None:
+            return cls()
+        return cls(
+            prompt_tokens=metadata.prompt_token_count or 0,
+            output_tokens=metadata.candidates_token_count or 0,
+            total_tokens=metadata.total_token_count or 0,
+        )
+
+
+@dataclass(slots=True)
+class GenerationResult:
+    """
+    The parts of a generate_content reply the client actually uses: text, inline images and token usage.
+    Its repr never includes image payloads, so it is safe to log.
+    """
+    text: str = ""
+    images: list[InlineImage] = field(default_factory=list)
+    usage: Usage = field(default_factory=Usage)
+    finish_reason: str | None = None
+
+    async def decode_image(self) -> Image.Image:
+        """
+        Decode the first inline image that is a valid image file.
+
+        Raises:
+            ValueError: If the reply carries no decodable image.
+        """
+        for image in self.images:
+            try:
+                return await image.decode()
+            except (UnidentifiedImageError, OSError) as e:
+                print(f"⚠️ Skipping undecodable {image}: {e}")
+        raise ValueError(f"No valid image data received from Gemini model (finish reason: {self.finish_reason}).")
+
+
+def parse_response(response: types.GenerateContentResponse) -> GenerationResult:
+    """
+    Extract text, inline images and usage from a generate_content reply without copying image payloads.
+
+    Args:
+        response (types.GenerateContentResponse): The SDK response.
+
+    Returns:
+        GenerationResult: The typed result.
+
+    Raises:
+        ValueError: If the reply has no candidates, e.g. because the prompt was blocked.
+    """
+    if not response or not response.candidates:
+        feedback = getattr(response, "prompt_feedback", None)
+        reason = f" (blocked: {feedback.block_reason})" if feedback and feedback.block_reason else ""
+        raise ValueError(f"No candidates received from Gemini model{reason}.")
+
+    candidate = response.candidates[0]
+    texts, images = [], []
+    for part in (candidate.content.parts if candidate.content else None) or []:
+        if part.inline_data is not None and part.inline_data.data and (part.inline_data.mime_type or "").startswith("image/"):
+            images.append(InlineImage(memoryview(part.inline_data.data), part.inline_data.mime_type))
+        elif part.text and not part.thought:
+            texts.append(part.text)
+
+    return GenerationResult(
+        text="".join(texts),
+        images=images,
+        usage=Usage.from_metadata(response.usage_metadata),
+        finish_reason=getattr(candidate.finish_reason, "value", candidate.finish_reason),
+    )
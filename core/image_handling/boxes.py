@@ -0,0 +1,187 @@
+import io
+import numpy as np
+
+# Gemini returns box coordinates normalized to a 0-1000 scale.
+NORMALIZED_SCALE = 1000.0
+
+
+class BoxArray:
+    """
+    A compact, vectorized collection of detected boxes.
+
+    Boxes are stored as a float32 (N, 4) array in Gemini's [ymin, xmin, ymax, xmax]
+    order on the 0-1000 normalized scale, alongside an (N,) label array and an (N,)
+    float32 confidence array. Every operation works on the whole array at once, so
+    post-processing thousands of boxes costs a handful of NumPy calls.
+    """
+
+    __slots__ = ("boxes", "labels", "confidences")
+
+    def __init__(self, boxes, labels=None, confidences=None):
+        """
+        Args:
+            boxes (array-like): (N, 4) coordinates as [ymin, xmin, ymax, xmax] on the 0-1000 scale.
+            labels (array-like): Optional (N,) labels. Defaults to empty strings.
+            confidences (array-like): Optional (N,) confidences in [0, 1]. Defaults to 1.0.
+        """
+        self.boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        n = len(self.boxes)
+        self.labels = np.asarray(labels if labels is not None else [""] * n, dtype=np.str_).reshape(n)
+        self.confidences = np.asarray(confidences if confidences is not None else np.ones(n), dtype=np.float32).reshape(n)
+
+    @classmethod
+    def empty(cls) -> "BoxArray":
+        return cls(np.empty((0, 4), dtype=np.float32))
+
+    @classmethod
+    def from_detections(cls, detections) -> "BoxArray":
+        """
+        Build a BoxArray from structured-output detections exposing label, confidence and box_2d.
+        Detections whose box_2d does not have exactly four values are dropped.
+        """
+        valid = [d for d in detections if len(d.box_2d) == 4]
+        if not valid:
+            return cls.empty()
+        return cls(
+            [d.box_2d for d in valid],
+            [d.label for d in valid],
+            [d.confidence for d in valid],
+        )
+
+    @classmethod
+    def from_list(cls, items: list[dict]) -> "BoxArray":
+        """
+        Build a BoxArray from dictionaries with 'ymin', 'xmin', 'ymax', 'xmax' and optional
+        'label' and 'confidence' keys, as produced by to_list.
+        """
+        if not items:
+            return cls.empty()
+        return cls(
+            [[item["ymin"], item["xmin"], item["ymax"], item["xmax"]] for item in items],
+            [item.get("label", "") for item in items],
+            [item.get("confidence", 1.0) for item in items],
+        )
+
+    def __len__(self) -> int:
+        return len(self.boxes)
+
+    def __getitem__(self, index) -> "BoxArray":
+        """
+        Select boxes with an integer, slice, index array or boolean mask.
+        """
+        if isinstance(index, (int, np.integer)):
+            index = [index]
+        return BoxArray(self.boxes[index], self.labels[index], self.confidences[index])
+
+    def __repr__(self) -> str:
+        return f"BoxArray(n={len(self)})"
+
+    def to_pixels(self, width: int, height: int) -> np.ndarray:
+        """
+        Convert the normalized boxes into pixel coordinates of an image.
+
+        Args:
+            width (int): Image width in pixels.
+            height (int): Image height in pixels.
+
+        Returns:
+            np.ndarray: int32 (N, 4) array of [ymin, xmin, ymax, xmax] pixel coordinates.
+        """
+        scale = np.array([height, width, height, width], dtype=np.float32) / NORMALIZED_SCALE
+        return (self.boxes * scale).astype(np.int32)
+
+    def areas(self) -> np.ndarray:
+        """
+        Return the (N,) normalized areas of the boxes.
+        """
+        heights = np.clip(self.boxes[:, 2] - self.boxes[:, 0], 0, None)
+        widths = np.clip(self.boxes[:, 3] - self.boxes[:, 1], 0, None)
+        return heights * widths
+
+    def iou(self, other: "BoxArray" = None) -> np.ndarray:
+        """
+        Compute the pairwise intersection-over-union matrix.
+
+        Args:
+            other (BoxArray): Boxes to compare against. Defaults to self.
+
+        Returns:
+            np.ndarray: float32 (N, M) IoU matrix.
+        """
+        other = self if other is None else other
+        a = self.boxes[:, None, :]
+        b = other.boxes[None, :, :]
+        top = np.maximum(a[..., 0], b[..., 0])
+        left = np.maximum(a[..., 1], b[..., 1])
+        bottom = np.minimum(a[..., 2], b[..., 2])
+        right = np.minimum(a[..., 3], b[..., 3])
+        intersection = np.clip(bottom - top, 0, None) * np.clip(right - left, 0, None)
+        union = self.areas()[:, None] + other.areas()[None, :] - intersection
+        return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+    def filter(self, min_confidence: float = None, labels=None, min_area: float = None) -> "BoxArray":
+        """
+        Keep only the boxes matching every given criterion.
+
+        Args:
+            min_confidence (float): Minimum confidence to keep a box.
+            labels (iterable): Labels to keep.
+            min_area (float): Minimum normalized area (0-1000 scale squared).
+
+        Returns:
+            BoxArray: The matching boxes.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if min_confidence is not None:
+            mask &= self.confidences >= min_confidence
+        if labels is not None:
+            mask &= np.isin(self.labels, list(labels))
+        if min_area is not None:
+            mask &= self.areas() >= min_area
+        return self[mask]
+
+    def non_max_suppression(self, iou_threshold: float = 0.5) -> "BoxArray":
+        """
+        Drop boxes overlapping a higher-confidence box of the same label by more than iou_threshold.
+        """
+        order = np.argsort(-self.confidences, kind="stable")
+        ordered = self[order]
+        overlaps = ordered.iou() > iou_threshold
+        overlaps &= ordered.labels[:, None] == ordered.labels[None, :]
+        keep = np.ones(len(ordered), dtype=bool)
+        for i in range(len(ordered)):
+            if keep[i]:
+                keep[i + 1:] &= ~overlaps[i, i + 1:]
+        return ordered[keep]
+
+    def to_list(self) -> list[dict]:
+        """
+        Serialize the boxes to JSON-friendly dictionaries.
+        """
+        return [
+            {
+                "ymin": float(box[0]),
+                "xmin": float(box[1]),
+                "ymax": float(box[2]),
+                "xmax": float(box[3]),
+                "label": str(label),
+                "confidence": float(confidence),
+            }
+            for box, label, confidence in zip(self.boxes, self.labels, self.confidences)
+        ]
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialize the boxes to a compact binary (NumPy .npz) blob.
+        """
+        with io.BytesIO() as buffer:
+            np.savez_compressed(buffer, boxes=self.boxes, labels=self.labels, confidences=self.confidences)
+            return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BoxArray":
+        """
+        Load boxes serialized with to_bytes.
+        """
+        with np.load(io.BytesIO(data), allow_pickle=False) as archive:
+            return cls(archive["boxes"], archive["labels"], archive["confidences"])
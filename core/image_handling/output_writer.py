@@ -0,0 +1,183 @@
+import asyncio
+import os
+import stat
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from PIL import Image, features
+from settings import settings
+
+# Encoder presets: PIL format, file extension and save options.
+PRESETS = {
+    "webp": ("WEBP", ".webp", {"quality": 85, "method": 4}),
+    "webp_lossless": ("WEBP", ".webp", {"lossless": True, "quality": 80, "method": 4}),
+    "avif": ("AVIF", ".avif", {"quality": 60, "speed": 6}),
+    "jpeg": ("JPEG", ".jpg", {"quality": 88, "optimize": True, "progressive": True}),
+    "png": ("PNG", ".png", {}),
+}
+
+# mkstemp creates files as 0600; renamed outputs get the mode a plain open() would have given them.
+# The umask can only be read by setting it, so it is read once at import rather than from writer threads.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+EXTENSION_PRESETS = {
+    ".webp": "webp",
+    ".avif": "avif",
+    ".jpg": "jpeg",
+    ".jpeg": "jpeg",
+    ".png": "png",
+}
+
+
+@dataclass
+class WrittenImage:
+    path: str
+    bytes_written: int
+    thumbnail_path: str | None = None
+
+
+def resolve_preset(path: str, preset: str = None) -> tuple[str, str]:
+    """
+    Pick the encoder preset for an output path and return (preset, final path).
+
+    With preset "auto" (or None) the preset follows the path's extension, and paths
+    without one are written as WebP. Otherwise the path's extension is rewritten to
+    match the preset. AVIF falls back to WebP
+    when Pillow was built without AVIF support.
+    """
+    stem, extension = os.path.splitext(path)
+    if not preset or preset == "auto":
+        preset = EXTENSION_PRESETS.get(extension.lower(), "png") if extension else "webp"
+    if preset not in PRESETS:
+        raise ValueError(f"Unknown output preset: {preset}")
+    if preset == "avif" and not features.check("avif"):
+        print("⚠️ AVIF encoding is not available in this Pillow build, writing WebP instead")
+        preset = "webp"
+    if EXTENSION_PRESETS.get(extension.lower()) != preset:
+        path = stem + PRESETS[preset][1]
+    return preset, path
+
+
+def _prepare(image: Image.Image, format: str) -> Image.Image:
+    if format == "JPEG" and image.mode not in ("RGB", "L"):
+        return image.convert("RGB")
+    if format in ("WEBP", "AVIF") and image.mode not in ("RGB", "RGBA"):
+        return image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+    return image
+
+
+def atomic_save(image: Image.Image, path: str, preset: str) -> int:
+    """
+    Encode image with a preset into a temporary file next to path and atomically
+    rename it into place, so readers never see a partially written file.
+
+    Returns:
+        int: Number of bytes written.
+    """
+    format, extension, params = PRESETS[preset]
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".tmp-", suffix=extension, dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            _prepare(image, format).save(f, format=format, **params)
+            size = f.tell()
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return size
+
+
+def encode_output(image: Image.Image, path: str, preset: str = None, thumbnail_size: tuple[int, int] = None) -> WrittenImage:
+    """
+    Encode and atomically write an image, plus an optional thumbnail next to it.
+
+    Args:
+        image (Image.Image): The image to write.
+        path (str): Requested output path; its extension may be rewritten to match the preset.
+        preset (str): One of PRESETS, or "auto" to follow the path's extension.
+        thumbnail_size (tuple[int, int]): Optional maximum (width, height) of a "<name>_thumb" copy.
+
+    Returns:
+        WrittenImage: Where the files were written and how large the main file is.
+    """
+    preset, path = resolve_preset(path, preset)
+    written = WrittenImage(path=path, bytes_written=atomic_save(image, path, preset))
+    if thumbnail_size:
+        thumbnail = image.copy()
+        thumbnail.thumbnail(thumbnail_size)
+        stem, extension = os.path.splitext(path)
+        written.thumbnail_path = f"{stem}_thumb{extension}"
+        atomic_save(thumbnail, written.thumbnail_path, preset)
+    return written
+
+
+class OutputWriter:
+    """
+    Background encoder pool for generated images.
+
+    submit() returns immediately with an asyncio future, so encoding and disk writes
+    overlap with the next API call instead of holding it up. Call drain() before
+    exiting to wait for outstanding writes.
+    """
+
+    def __init__(self, max_workers: int = None, preset: str = None, thumbnail_size: tuple[int, int] = None):
+        """
+        Args:
+            max_workers (int): Encoder threads. Defaults to OUTPUT_WRITER_WORKERS.
+            preset (str): Default preset. Defaults to OUTPUT_IMAGE_PRESET.
+            thumbnail_size (tuple[int, int]): Default thumbnail size. Defaults to OUTPUT_THUMBNAIL_SIZE.
+        """
+        self.max_workers = max_workers or settings.OUTPUT_WRITER_WORKERS
+        self.preset = preset or settings.OUTPUT_IMAGE_PRESET
+        self.thumbnail_size = thumbnail_size if thumbnail_size is not None else settings.OUTPUT_THUMBNAIL_SIZE
+        self._executor: ThreadPoolExecutor | None = None
+        self._pending: set[asyncio.Future] = set()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="image-engineer-writer")
+        return self._executor
+
+    def submit(self, image: Image.Image, path: str, preset: str = None,
+               thumbnail_size: tuple[int, int] = None) -> asyncio.Future:
+        """
+        Queue an image for encoding and return a future resolving to a WrittenImage.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self._get_executor(),
+            encode_output,
+            image,
+            path,
+            preset or self.preset,
+            thumbnail_size if thumbnail_size is not None else self.thumbnail_size,
+        )
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+        return future
+
+    async def write(self, image: Image.Image, path: str, preset: str = None,
+                    thumbnail_size: tuple[int, int] = None) -> WrittenImage:
+        """
+        Encode and write an image, waiting for the result.
+        """
+        return await self.submit(image, path, preset, thumbnail_size)
+
+    async def drain(self) -> None:
+        """
+        Wait for every queued write to finish. Failures are left on their futures.
+        """
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
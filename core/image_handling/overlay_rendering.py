@@ -0,0 +1,177 @@
+import base64
+import colorsys
+import io
+import math
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+import numpy as np
+from PIL import Image
+from core.image_handling.boxes import BoxArray, NORMALIZED_SCALE
+
+MASK_THRESHOLD = 127
+
+
+@dataclass
+class RenderTask:
+    """
+    One QA overlay job: a source image plus the detections to draw on it.
+    Plain data only, so tasks can be shipped to worker processes.
+    """
+    image_path: str
+    output_path: str
+    boxes: BoxArray | None = None
+    segmentation: list = field(default_factory=list)
+
+
+def color_lut(count: int) -> np.ndarray:
+    """
+    Build a (count + 1, 3) uint8 color lookup table of well-separated hues.
+    Row 0 is reserved for "no label" and stays black.
+    """
+    hues = (np.arange(count) * 0.618033988749895) % 1.0
+    colors = [colorsys.hsv_to_rgb(h, 0.85, 1.0) for h in hues]
+    lut = np.zeros((count + 1, 3), dtype=np.uint8)
+    if count:
+        lut[1:] = np.round(np.array(colors) * 255)
+    return lut
+
+
+def decode_mask(mask: str, width: int, height: int) -> np.ndarray:
+    """
+    Decode a Gemini segmentation mask (base64 PNG, optionally a data URL) into a
+    boolean array of the given size.
+    """
+    if mask.startswith("data:"):
+        mask = mask.split(",", 1)[1]
+    with Image.open(io.BytesIO(base64.b64decode(mask))) as image:
+        resized = image.convert("L").resize((width, height), Image.BILINEAR)
+    return np.asarray(resized) > MASK_THRESHOLD
+
+
+def _label_ids(labels: list[str]) -> tuple[list[str], np.ndarray]:
+    names, inverse = np.unique(np.asarray(labels, dtype=np.str_), return_inverse=True)
+    return list(names), inverse.astype(np.uint16) + 1
+
+
+def render_overlay(image: Image.Image, boxes: BoxArray = None, segmentation: list = None,
+                   alpha: float = 0.5, box_thickness: int = 3) -> Image.Image:
+    """
+    Overlay detection boxes and segmentation masks on an image.
+
+    Every mask is first rasterized into a single label map; the color of each pixel
+    is then looked up in a per-label LUT and alpha-blended in one NumPy pass. Box
+    outlines are collected into a second label map and painted in one assignment.
+    Objects sharing a label share a color.
+
+    Args:
+        image (Image.Image): The source image.
+        boxes (BoxArray): Optional detections from get_bounding_objects.
+        segmentation (list): Optional entries from get_segmentation with 'box_2d', 'mask' and 'label'.
+        alpha (float): Mask opacity in [0, 1].
+        box_thickness (int): Box outline width in pixels.
+
+    Returns:
+        Image.Image: A new RGB image with the overlay.
+    """
+    pixels = np.array(image.convert("RGB"))
+    height, width = pixels.shape[:2]
+    boxes = boxes if boxes is not None else BoxArray.empty()
+    segmentation = [entry for entry in (segmentation or []) if len(entry.get("box_2d", [])) == 4]
+
+    names, ids = _label_ids(list(boxes.labels) + [entry.get("label", "") for entry in segmentation])
+    lut = color_lut(len(names))
+    box_ids, mask_ids = ids[:len(boxes)], ids[len(boxes):]
+
+    if segmentation:
+        mask_map = np.zeros((height, width), dtype=np.uint16)
+        scale = np.array([height, width, height, width], dtype=np.float32) / NORMALIZED_SCALE
+        mask_boxes = (np.array([entry["box_2d"] for entry in segmentation], dtype=np.float32) * scale).astype(np.int32)
+        mask_boxes[:, [0, 2]] = np.clip(mask_boxes[:, [0, 2]], 0, height)
+        mask_boxes[:, [1, 3]] = np.clip(mask_boxes[:, [1, 3]], 0, width)
+        for entry, (y0, x0, y1, x1), label_id in zip(segmentation, mask_boxes, mask_ids):
+            if y1 <= y0 or x1 <= x0 or not entry.get("mask"):
+                continue
+            region = mask_map[y0:y1, x0:x1]
+            region[decode_mask(entry["mask"], x1 - x0, y1 - y0)] = label_id
+
+        covered = mask_map > 0
+        colors = lut[mask_map[covered]].astype(np.float32)
+        pixels[covered] = (pixels[covered] * (1.0 - alpha) + colors * alpha).astype(np.uint8)
+
+    if len(boxes):
+        outline_map = np.zeros((height, width), dtype=np.uint16)
+        pixel_boxes = boxes.to_pixels(width, height)
+        pixel_boxes[:, [0, 2]] = np.clip(pixel_boxes[:, [0, 2]], 0, height - 1)
+        pixel_boxes[:, [1, 3]] = np.clip(pixel_boxes[:, [1, 3]], 0, width - 1)
+        t = box_thickness
+        for (y0, x0, y1, x1), label_id in zip(pixel_boxes, box_ids):
+            outline_map[y0:y0 + t, x0:x1 + 1] = label_id
+            outline_map[max(y1 - t + 1, 0):y1 + 1, x0:x1 + 1] = label_id
+            outline_map[y0:y1 + 1, x0:x0 + t] = label_id
+            outline_map[y0:y1 + 1, max(x1 - t + 1, 0):x1 + 1] = label_id
+        outlined = outline_map > 0
+        pixels[outlined] = lut[outline_map[outlined]]
+
+    return Image.fromarray(pixels)
+
+
+def render_file(task: RenderTask) -> str:
+    """
+    Render one RenderTask to disk and return its output path.
+    """
+    with Image.open(task.image_path) as image:
+        overlay = render_overlay(image, task.boxes, task.segmentation)
+    overlay.save(task.output_path)
+    return task.output_path
+
+
+def render_batch(tasks: list[RenderTask], max_workers: int = None) -> list[str]:
+    """
+    Render many overlays across a process pool.
+
+    Args:
+        tasks (list[RenderTask]): The overlays to render.
+        max_workers (int): Number of worker processes. Defaults to the CPU count.
+
+    Returns:
+        list[str]: Output paths, in task order.
+    """
+    if len(tasks) <= 1:
+        return [render_file(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(render_file, tasks, chunksize=max(1, len(tasks) // 64)))
+
+
+def write_contact_sheet(image_paths: list[str], output_path: str, columns: int = 4,
+                        thumb_size: tuple[int, int] = (320, 320), background: tuple = (24, 24, 24)) -> str:
+    """
+    Tile images into a single contact sheet for quick visual review.
+
+    Args:
+        image_paths (list[str]): Images to tile, in reading order.
+        output_path (str): Where to save the sheet.
+        columns (int): Number of tiles per row.
+        thumb_size (tuple[int, int]): Maximum (width, height) of each tile.
+        background (tuple): RGB fill color between tiles.
+
+    Returns:
+        str: The output path.
+    """
+    if not image_paths:
+        raise ValueError("No images given for the contact sheet")
+    tile_width, tile_height = thumb_size
+    rows = math.ceil(len(image_paths) / columns)
+    sheet = np.empty((rows * tile_height, columns * tile_width, 3), dtype=np.uint8)
+    sheet[:] = background
+    for n, image_path in enumerate(image_paths):
+        with Image.open(image_path) as image:
+            image.draft("RGB", thumb_size)
+            image = image.convert("RGB")
+            image.thumbnail(thumb_size)
+            tile = np.asarray(image)
+        row, column = divmod(n, columns)
+        top = row * tile_height + (tile_height - tile.shape[0]) // 2
+        left = column * tile_width + (tile_width - tile.shape[1]) // 2
+        sheet[top:top + tile.shape[0], left:left + tile.shape[1]] = tile
+    Image.fromarray(sheet).save(output_path)
+    return output_path
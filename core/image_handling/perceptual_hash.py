@@ -0,0 +1,170 @@
+import functools
+import io
+import numpy as np
+from PIL import Image
+
+HASH_BITS = 64
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+
+def dhash(image: Image.Image, hash_size: int = 8) -> int:
+    """
+    Compute the 64-bit difference hash of an image.
+
+    The image is reduced to a (hash_size + 1) x hash_size grayscale thumbnail and each
+    bit records whether a pixel is brighter than its right-hand neighbour.
+
+    Args:
+        image (Image.Image): The input image.
+        hash_size (int): Side of the hash grid. 8 gives a 64-bit hash.
+
+    Returns:
+        int: The hash as an unsigned integer.
+    """
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = np.asarray(small, dtype=np.int16)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+@functools.lru_cache(maxsize=4)
+def _dct_matrix(size: int) -> np.ndarray:
+    n = np.arange(size)
+    matrix = np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / (2 * size))
+    matrix[0] *= np.sqrt(1 / size)
+    matrix[1:] *= np.sqrt(2 / size)
+    return matrix
+
+
+def phash(image: Image.Image, hash_size: int = 8, highfreq_factor: int = 4) -> int:
+    """
+    Compute the 64-bit DCT perceptual hash of an image.
+
+    The image is reduced to a small grayscale square, transformed with a 2D DCT
+    (two matrix products), and each bit of the low-frequency block records whether
+    the coefficient is above the block median. Robust to re-compression, resizing
+    and mild exposure changes.
+
+    Args:
+        image (Image.Image): The input image.
+        hash_size (int): Side of the low-frequency block. 8 gives a 64-bit hash.
+        highfreq_factor (int): Oversampling of the thumbnail before the DCT.
+
+    Returns:
+        int: The hash as an unsigned integer.
+    """
+    size = hash_size * highfreq_factor
+    small = image.convert("L").resize((size, size), Image.LANCZOS)
+    pixels = np.asarray(small, dtype=np.float32)
+    dct = _dct_matrix(size)
+    low = (dct @ pixels @ dct.T)[:hash_size, :hash_size]
+    median = np.median(low.ravel()[1:])  # the DC term only tracks overall brightness
+    return _bits_to_int(low > median)
+
+
+HASH_FUNCTIONS = {"dhash": dhash, "phash": phash}
+
+
+def hash_file(image_path: str | bytes, method: str = "phash") -> int:
+    """
+    Open an image file and compute its perceptual hash.
+
+    Args:
+        image_path (str | bytes): Path to the image, or the encoded image bytes.
+        method (str): "phash" or "dhash".
+
+    Returns:
+        int: The 64-bit hash.
+    """
+    try:
+        hash_function = HASH_FUNCTIONS[method]
+    except KeyError:
+        raise ValueError(f"Unknown perceptual hash method: {method}")
+    if isinstance(image_path, (bytes, bytearray, memoryview)):
+        image_path = io.BytesIO(image_path)
+    with Image.open(image_path) as image:
+        image.draft("L", (64, 64))  # let JPEG decode at reduced scale
+        return hash_function(image)
+
+
+def similarity(distance) -> float:
+    """
+    Convert a Hamming distance between 64-bit hashes into a similarity in [0, 1].
+    """
+    return 1.0 - distance / HASH_BITS
+
+
+class PerceptualHashIndex:
+    """
+    In-memory index of 64-bit perceptual hashes with vectorized Hamming lookup.
+
+    Hashes live in a single uint64 array, so one lookup is an XOR and a popcount
+    over the whole index rather than a Python loop. The array grows geometrically,
+    and with max_size set the least recently used entry is replaced once it is full.
+    """
+
+    def __init__(self, max_size: int = None):
+        """
+        Args:
+            max_size (int): Maximum number of entries kept; unbounded when None.
+        """
+        self.max_size = max_size
+        self._hashes = np.empty(16, dtype=np.uint64)
+        self._last_used = np.empty(16, dtype=np.uint64)
+        self._values = []
+        self._clock = 0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def add(self, image_hash: int, value) -> None:
+        """
+        Store a value (typically an analysis result) under a hash.
+        """
+        size = len(self._values)
+        if self.max_size is not None and size >= self.max_size:
+            slot = int(np.argmin(self._last_used[:size]))
+            self._hashes[slot] = image_hash
+            self._last_used[slot] = self._tick()
+            self._values[slot] = value
+            return
+        if size == len(self._hashes):
+            capacity = size * 2 if self.max_size is None else min(size * 2, self.max_size)
+            self._hashes = np.resize(self._hashes, capacity)
+            self._last_used = np.resize(self._last_used, capacity)
+        self._hashes[size] = image_hash
+        self._last_used[size] = self._tick()
+        self._values.append(value)
+
+    def distances(self, image_hash: int) -> np.ndarray:
+        """
+        Return the Hamming distance from image_hash to every stored hash.
+        """
+        return np.bitwise_count(self._hashes[:len(self._values)] ^ np.uint64(image_hash))
+
+    def lookup(self, image_hash: int, min_similarity: float):
+        """
+        Find the closest stored entry at or above the similarity threshold.
+
+        Args:
+            image_hash (int): The hash to look up.
+            min_similarity (float): Minimum similarity in [0, 1] to accept a match.
+
+        Returns:
+            tuple | None: (value, similarity) of the best match, or None if nothing is close enough.
+        """
+        if not self._values:
+            return None
+        distances = self.distances(image_hash)
+        best = int(np.argmin(distances))
+        score = similarity(int(distances[best]))
+        if score < min_similarity:
+            return None
+        self._last_used[best] = self._tick()
+        return self._values[best], score
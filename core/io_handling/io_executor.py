@@ -0,0 +1,209 @@
+import asyncio
+import functools
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from settings import settings
+
+_executor: ThreadPoolExecutor | None = None
+_slots: asyncio.Semaphore | None = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Return the shared thread pool used for blocking file and image work.
+    The pool is created lazily so importing this module has no side effects.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IO_MAX_WORKERS,
+            thread_name_prefix="image-engineer-io",
+        )
+    return _executor
+
+
+def _get_slots() -> asyncio.Semaphore:
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(settings.IO_MAX_PENDING)
+    return _slots
+
+
+async def run_io(func, *args, **kwargs):
+    """
+    Run a blocking callable on the I/O thread pool without stalling the event loop.
+
+    At most IO_MAX_PENDING jobs are queued at once; further callers wait here
+    instead of piling up unbounded work behind the pool.
+
+    Args:
+        func (callable): The blocking function to run.
+        *args: Positional arguments for func.
+        **kwargs: Keyword arguments for func.
+
+    Returns:
+        Any: Whatever func returns.
+    """
+    loop = asyncio.get_running_loop()
+    async with _get_slots():
+        return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _write_file(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _read_text(path: str) -> str:
+    with open(path, "r") as f:
+        return f.read()
+
+
+def _open_image(path: str) -> Image.Image:
+    image = Image.open(path)
+    image.load()
+    return image
+
+
+def _decode_image(data: bytes) -> Image.Image:
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    return image
+
+
+def _encode_image(image: Image.Image, format: str, params: dict) -> bytes:
+    with io.BytesIO() as buffer:
+        image.save(buffer, format=format, **params)
+        return buffer.getvalue()
+
+
+def _save_image(image: Image.Image, path: str, params: dict) -> None:
+    image.save(path, **params)
+
+
+async def read_bytes(path: str) -> bytes:
+    """
+    Read a whole file as bytes on the I/O pool.
+    """
+    return await run_io(_read_file, path)
+
+
+async def write_bytes(path: str, data: bytes) -> None:
+    """
+    Write bytes to a file on the I/O pool.
+    """
+    await run_io(_write_file, path, data)
+
+
+async def read_text(path: str) -> str:
+    """
+    Read a whole text file on the I/O pool.
+    """
+    return await run_io(_read_text, path)
+
+
+async def open_image(path: str) -> Image.Image:
+    """
+    Open and fully decode an image file on the I/O pool.
+    """
+    return await run_io(_open_image, path)
+
+
+async def decode_image(data: bytes) -> Image.Image:
+    """
+    Decode encoded image bytes (PNG, JPEG, ...) into a PIL image on the I/O pool.
+    """
+    return await run_io(_decode_image, data)
+
+
+async def encode_image(image: Image.Image, format: str, **params) -> bytes:
+    """
+    Encode a PIL image into bytes of the given format on the I/O pool.
+
+    Args:
+        image (Image.Image): The image to encode.
+        format (str): A PIL format name such as "PNG" or "JPEG".
+        **params: Extra encoder options passed to Image.save.
+
+    Returns:
+        bytes: The encoded image.
+    """
+    return await run_io(_encode_image, image, format, params)
+
+
+async def save_image(image: Image.Image, path: str, **params) -> None:
+    """
+    Save a PIL image to disk on the I/O pool. The format is inferred from the path
+    unless given in params.
+    """
+    await run_io(_save_image, image, path, params)
+
+
+class LoopLagDetector:
+    """
+    Detect event loop stalls caused by blocking calls running inside coroutines.
+
+    A heartbeat task sleeps for a fixed interval and measures how late it wakes up;
+    any overshoot beyond the threshold is reported. The loop's own slow callback
+    logging is tuned to the same threshold, so with asyncio debug mode enabled the
+    offending callback is also named in the asyncio log.
+    """
+
+    def __init__(self, threshold: float = None, interval: float = None, on_lag=None):
+        """
+        Args:
+            threshold (float): Lag in seconds above which a stall is reported.
+            interval (float): Heartbeat period in seconds.
+            on_lag (callable): Optional callback receiving the measured lag in seconds.
+                               Defaults to printing a warning.
+        """
+        self.threshold = settings.LOOP_LAG_THRESHOLD if threshold is None else threshold
+        self.interval = settings.LOOP_LAG_INTERVAL if interval is None else interval
+        self.on_lag = on_lag or self._report
+        self.max_lag = 0.0
+        self.stall_count = 0
+        self._task: asyncio.Task | None = None
+
+    @staticmethod
+    def _report(lag: float) -> None:
+        print(f"⚠️ Event loop blocked for {lag * 1000:.0f} ms")
+
+    def start(self) -> None:
+        """
+        Start the heartbeat on the running event loop.
+        """
+        if self._task is not None:
+            return
+        loop = asyncio.get_running_loop()
+        loop.slow_callback_duration = self.threshold
+        self._task = loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stop the heartbeat task.
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = time.perf_counter() - started - self.interval
+            if lag > self.threshold:
+                self.stall_count += 1
+                self.max_lag = max(self.max_lag, lag)
+                self.on_lag(lag)
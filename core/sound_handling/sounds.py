@@ -1,11 +1,39 @@
+import asyncio
+import math
+import re
+from collections import OrderedDict
 import httpx
+import imageio_ffmpeg
+import numpy as np
 from settings import settings
+from core.io_handling import io_executor
 
 # Optional: pick a specific voice ID or use the default
 VOICE_ID = "EXAVITQu4vr4xnSDxMaL"  # You can explore voices at https://elevenlabs.io/voice-library
 JOSH_VOICE_ID = "TxGEqnHWrfWFTfGW9XjX"
 
-async def text_to_effect(effect_description: str, duration_seconds: int = 5, prompt_influence: float = 0.8) -> bytes:
+MAX_EFFECT_SECONDS = 22  # ElevenLabs sound-generation limit per request
+MIN_EFFECT_SECONDS = 0.5
+SAMPLE_RATE = 44100
+CHANNELS = 2
+
+_http_client: httpx.AsyncClient | None = None
+_effect_cache: OrderedDict = OrderedDict()
+_effect_in_flight: dict = {}
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the module-wide HTTP client, so concurrent requests share pooled connections.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(timeout=httpx.Timeout(settings.ELEVEN_LABS_TIMEOUT))
+    return _http_client
+
+
+async def text_to_effect(effect_description: str, duration_seconds: float = 5, prompt_influence: float = 0.8,
+                         client: httpx.AsyncClient = None) -> bytes:
     """
     Generates a sound effect using ElevenLabs' sound generation API,
     based on a rich textual description.
@@ -14,6 +42,7 @@ async def text_to_effect(effect_description: str, duration_seconds: int = 5, pro
         effect_description (str): A vivid description of the desired sound effect.
         duration_seconds (int): Duration of the generated sound in seconds (max 22).
         prompt_influence (float): Value between 0 and 1; higher means closer to prompt.
+        client (httpx.AsyncClient): Optional shared client. A one-off client is used when omitted.
 
     Returns:
         bytes: The MP3 audio binary data.
@@ -32,8 +61,11 @@ async def text_to_effect(effect_description: str, duration_seconds: int = 5, pro
         "prompt_influence": prompt_influence
     }
 
-    async with httpx.AsyncClient() as client:
+    if client is not None:
         response = await client.post(url, json=payload, headers=headers)
+    else:
+        async with httpx.AsyncClient() as client:
+            response = await client.post(url, json=payload, headers=headers)
 
     if response.status_code == 200:
         return response.content
@@ -41,24 +73,158 @@ async def text_to_effect(effect_description: str, duration_seconds: int = 5, pro
         raise Exception(f"Failed to generate sound effect: {response.status_code}, {response.text}")
 
 
-async def text_to_speech(text: str, voice_id: str = JOSH_VOICE_ID) -> bytes:
+def plan_segments(duration_seconds: float, max_seconds: float = MAX_EFFECT_SECONDS,
+                  overlap_seconds: float = None) -> list[float]:
     """
-    Generates a fantastic sound effect for an ad using ElevenLabs text-to-speech API.
-    
+    Split a target duration into equal, overlapping segment lengths that each fit one request.
+
     Args:
-        ad_description (str): A detailed description of the desired sound effect.
-    
+        duration_seconds (float): Total length wanted.
+        max_seconds (float): Longest segment a single request can return.
+        overlap_seconds (float): Crossfade length between neighbouring segments.
+                                 Defaults to SOUND_EFFECT_CROSSFADE_SECONDS.
+
     Returns:
-        bytes: The MP3 audio data.
+        list[float]: Segment durations; with n segments they sum to duration + (n - 1) * overlap.
     """
-    url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+    overlap = settings.SOUND_EFFECT_CROSSFADE_SECONDS if overlap_seconds is None else overlap_seconds
+    if duration_seconds <= max_seconds:
+        return [max(duration_seconds, MIN_EFFECT_SECONDS)]
+    count = math.ceil((duration_seconds - overlap) / (max_seconds - overlap))
+    length = (duration_seconds + (count - 1) * overlap) / count
+    return [round(length, 2)] * count
 
-    headers = {
+
+async def _run_ffmpeg(args: list[str], data: bytes) -> bytes:
+    process = await asyncio.create_subprocess_exec(
+        imageio_ffmpeg.get_ffmpeg_exe(), "-hide_banner", "-loglevel", "error", *args,
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+    )
+    output, errors = await process.communicate(data)
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {errors.decode(errors='replace').strip()}")
+    return output
+
+
+async def decode_audio(audio_bytes: bytes) -> np.ndarray:
+    """
+    Decode compressed audio into float32 PCM of shape (samples, CHANNELS) at SAMPLE_RATE.
+    """
+    raw = await _run_ffmpeg(
+        ["-i", "pipe:0", "-f", "f32le", "-ac", str(CHANNELS), "-ar", str(SAMPLE_RATE), "pipe:1"],
+        audio_bytes,
+    )
+    return np.frombuffer(raw, dtype=np.float32).reshape(-1, CHANNELS)
+
+
+async def encode_mp3(pcm: np.ndarray, bitrate: str = "192k") -> bytes:
+    """
+    Encode float32 PCM of shape (samples, CHANNELS) at SAMPLE_RATE into MP3.
+    """
+    return await _run_ffmpeg(
+        ["-f", "f32le", "-ac", str(CHANNELS), "-ar", str(SAMPLE_RATE), "-i", "pipe:0",
+         "-c:a", "libmp3lame", "-b:a", bitrate, "-f", "mp3", "pipe:1"],
+        np.ascontiguousarray(pcm, dtype=np.float32).tobytes(),
+    )
+
+
+def crossfade(segments: list[np.ndarray], overlap_samples: int, total_samples: int) -> np.ndarray:
+    """
+    Join PCM segments with equal-power crossfades and return exactly total_samples samples.
+
+    Each boundary fades the outgoing segment with cos and the incoming one with sin over
+    overlap_samples, which keeps perceived loudness constant through the transition.
+    A track shorter than total_samples is padded with silence.
+
+    Args:
+        segments (list[np.ndarray]): float32 (samples, channels) arrays, in order.
+        overlap_samples (int): Length of each crossfade.
+        total_samples (int): Exact length of the result.
+
+    Returns:
+        np.ndarray: float32 (total_samples, channels) track.
+    """
+    channels = segments[0].shape[1]
+    output = np.zeros((sum(len(segment) for segment in segments), channels), dtype=np.float32)
+    ramp = np.linspace(0.0, np.pi / 2, overlap_samples, dtype=np.float32)[:, None]
+    fade_in, fade_out = np.sin(ramp), np.cos(ramp)
+    position = 0
+    for n, segment in enumerate(segments):
+        segment = segment.copy()
+        overlap = min(overlap_samples, len(segment), position) if n else 0
+        if overlap:
+            segment[:overlap] *= fade_in[:overlap]
+            output[position - overlap:position] *= fade_out[:overlap]
+            position -= overlap
+        output[position:position + len(segment)] += segment
+        position += len(segment)
+    track = output[:position]
+    if len(track) >= total_samples:
+        return track[:total_samples]
+    return np.concatenate([track, np.zeros((total_samples - len(track), channels), dtype=np.float32)])
+
+
+async def text_to_long_effect(effect_description: str, duration_seconds: float, prompt_influence: float = 0.8) -> bytes:
+    """
+    Generate a sound effect of any length, beyond the 22 second per-request limit.
+
+    The duration is split into overlapping segments that are requested concurrently
+    through the shared HTTP client, decoded to PCM, joined with equal-power crossfades
+    and trimmed to exactly duration_seconds. Results are cached by prompt, duration and
+    prompt influence, and identical concurrent requests share one generation.
+
+    Args:
+        effect_description (str): A vivid description of the desired sound effect.
+        duration_seconds (float): Exact duration of the result in seconds.
+        prompt_influence (float): Value between 0 and 1; higher means closer to prompt.
+
+    Returns:
+        bytes: The MP3 audio binary data.
+    """
+    key = (effect_description, round(float(duration_seconds), 2), prompt_influence)
+    if key in _effect_cache:
+        _effect_cache.move_to_end(key)
+        return _effect_cache[key]
+    if key not in _effect_in_flight:
+        _effect_in_flight[key] = asyncio.ensure_future(
+            _generate_long_effect(effect_description, float(duration_seconds), prompt_influence)
+        )
+    task = _effect_in_flight[key]
+    try:
+        audio = await asyncio.shield(task)
+    finally:
+        if task.done():
+            _effect_in_flight.pop(key, None)
+    _effect_cache[key] = audio
+    while len(_effect_cache) > settings.SOUND_EFFECT_CACHE_SIZE:
+        _effect_cache.popitem(last=False)
+    return audio
+
+
+async def _generate_long_effect(effect_description: str, duration_seconds: float, prompt_influence: float) -> bytes:
+    segment_lengths = plan_segments(duration_seconds)
+    client = get_http_client()
+    if len(segment_lengths) == 1 and segment_lengths[0] == duration_seconds:
+        return await text_to_effect(effect_description, duration_seconds, prompt_influence, client=client)
+
+    encoded = await asyncio.gather(*(
+        text_to_effect(effect_description, length, prompt_influence, client=client) for length in segment_lengths
+    ))
+    segments = await asyncio.gather(*(decode_audio(audio) for audio in encoded))
+    overlap_samples = int(settings.SOUND_EFFECT_CROSSFADE_SECONDS * SAMPLE_RATE)
+    track = crossfade(list(segments), overlap_samples, int(round(duration_seconds * SAMPLE_RATE)))
+    return await encode_mp3(track)
+
+
+def _speech_headers() -> dict:
+    return {
         "xi-api-key": settings.ELEVEN_LABS_API_KEY,
         "Content-Type": "application/json",
         "Accept": "audio/mpeg"
     }
 
+
+def _speech_payload(text: str, previous_text: str = None, next_text: str = None) -> dict:
     payload = {
         "text": text,
         "model_id": "eleven_flash_v2_5",  # High-quality multilingual model
@@ -69,6 +235,27 @@ async def text_to_speech(text: str, voice_id: str = JOSH_VOICE_ID) -> bytes:
             "use_speaker_boost": True
         }
     }
+    # Neighbouring text keeps intonation continuous when a script is synthesized in pieces
+    if previous_text:
+        payload["previous_text"] = previous_text
+    if next_text:
+        payload["next_text"] = next_text
+    return payload
+
+
+async def text_to_speech(text: str, voice_id: str = JOSH_VOICE_ID) -> bytes:
+    """
+    Generates a fantastic sound effect for an ad using ElevenLabs text-to-speech API.
+    
+    Args:
+        ad_description (str): A detailed description of the desired sound effect.
+    
+    Returns:
+        bytes: The MP3 audio data.
+    """
+    url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+    headers = _speech_headers()
+    payload = _speech_payload(text)
 
     async with httpx.AsyncClient() as client:
         response = await client.post(url, json=payload, headers=headers)
@@ -78,3 +265,128 @@ async def text_to_speech(text: str, voice_id: str = JOSH_VOICE_ID) -> bytes:
     else:
         raise Exception(f"Failed to generate audio: {response.status_code}, {response.text}")
 
+
+def split_sentences(text: str, max_chars: int = None) -> list[str]:
+    """
+    Split a script at sentence boundaries into pieces of at most max_chars characters.
+    A single sentence longer than max_chars is kept whole.
+
+    Args:
+        text (str): The script.
+        max_chars (int): Target maximum piece length. Defaults to TTS_SEGMENT_MAX_CHARS.
+
+    Returns:
+        list[str]: Consecutive pieces of the script.
+    """
+    max_chars = max_chars or settings.TTS_SEGMENT_MAX_CHARS
+    sentences = [sentence for sentence in re.split(r"(?<=[.!?…])\s+", text.strip()) if sentence]
+    pieces = []
+    current = ""
+    for sentence in sentences:
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+async def text_to_speech_stream(text: str, voice_id: str = JOSH_VOICE_ID, previous_text: str = None,
+                                next_text: str = None):
+    """
+    Stream speech from the ElevenLabs streaming endpoint, yielding MP3 chunks as they arrive.
+
+    Args:
+        text (str): The text to speak.
+        voice_id (str): ElevenLabs voice ID.
+        previous_text (str): Optional text spoken just before, for continuous intonation.
+        next_text (str): Optional text spoken just after, for continuous intonation.
+
+    Yields:
+        bytes: Consecutive pieces of the MP3 stream.
+    """
+    url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}/stream"
+    payload = _speech_payload(text, previous_text, next_text)
+
+    async with get_http_client().stream("POST", url, json=payload, headers=_speech_headers()) as response:
+        if response.status_code != 200:
+            body = await response.aread()
+            raise Exception(f"Failed to stream audio: {response.status_code}, {body.decode(errors='replace')}")
+        async for chunk in response.aiter_bytes():
+            if chunk:
+                yield chunk
+
+
+async def text_to_speech_stream_long(text: str, voice_id: str = JOSH_VOICE_ID):
+    """
+    Stream speech for a long script, synthesizing sentence groups concurrently.
+
+    The script is split with split_sentences and up to TTS_MAX_CONCURRENT pieces are
+    streamed at once. Chunks of the first piece are yielded live while later pieces
+    buffer in the background, so time-to-first-audio is that of a single short request
+    and output order always follows the script.
+
+    Args:
+        text (str): The script to speak.
+        voice_id (str): ElevenLabs voice ID.
+
+    Yields:
+        bytes: MP3 chunks in script order.
+    """
+    pieces = split_sentences(text)
+    semaphore = asyncio.Semaphore(settings.TTS_MAX_CONCURRENT)
+    queues = [asyncio.Queue() for _ in pieces]
+    done = object()
+
+    async def pump(n: int):
+        queue = queues[n]
+        try:
+            async with semaphore:
+                async for chunk in text_to_speech_stream(
+                    pieces[n],
+                    voice_id,
+                    previous_text=pieces[n - 1] if n else None,
+                    next_text=pieces[n + 1] if n + 1 < len(pieces) else None,
+                ):
+                    queue.put_nowait(chunk)
+        except Exception as e:
+            queue.put_nowait(e)
+        finally:
+            queue.put_nowait(done)
+
+    tasks = [asyncio.ensure_future(pump(n)) for n in range(len(pieces))]
+    try:
+        for queue in queues:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def text_to_speech_to_file(text: str, output_path: str, voice_id: str = JOSH_VOICE_ID) -> str:
+    """
+    Synthesize a script straight to an MP3 file, writing each chunk as soon as it arrives.
+
+    Args:
+        text (str): The script to speak.
+        output_path (str): Where to write the MP3.
+        voice_id (str): ElevenLabs voice ID.
+
+    Returns:
+        str: The output path.
+    """
+    audio_file = await io_executor.run_io(open, output_path, "wb")
+    try:
+        async for chunk in text_to_speech_stream_long(text, voice_id):
+            await io_executor.run_io(audio_file.write, chunk)
+    finally:
+        await io_executor.run_io(audio_file.close)
+    return output_path
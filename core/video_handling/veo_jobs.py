@@ -0,0 +1,285 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from google.genai import errors, types
+from settings import settings
+from core.io_handling import io_executor
+from core.gemini.client_pool import ClientPool
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class VeoJob:
+    operation_name: str
+    prompt: str
+    filename: str
+    status: str = PENDING
+    error: str | None = None
+    created_at: float = 0.0
+
+
+class VeoJobStore:
+    """
+    Durable SQLite record of submitted Veo operations.
+
+    Every generation is written here right after submission, so a crash or Ctrl-C
+    never loses the handle of a paid-for video: on the next start the pending rows
+    are polled and downloaded instead of being resubmitted.
+    """
+
+    def __init__(self, path: str = None):
+        """
+        Args:
+            path (str): Path of the SQLite database file. Defaults to VEO_JOB_DB_PATH.
+        """
+        self.path = path or settings.VEO_JOB_DB_PATH
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS veo_jobs (
+                operation_name TEXT PRIMARY KEY,
+                prompt TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                status TEXT NOT NULL,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def add(self, operation_name: str, prompt: str, filename: str) -> VeoJob:
+        """
+        Record a freshly submitted operation as pending.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO veo_jobs VALUES (?, ?, ?, ?, NULL, ?, ?)",
+                (operation_name, prompt, filename, PENDING, now, now),
+            )
+            self._conn.commit()
+        return VeoJob(operation_name, prompt, filename, created_at=now)
+
+    def get(self, operation_name: str) -> VeoJob | None:
+        """
+        Return the job recorded under operation_name, if any.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT operation_name, prompt, filename, status, error, created_at FROM veo_jobs WHERE operation_name = ?",
+                (operation_name,),
+            ).fetchone()
+        return VeoJob(*row) if row else None
+
+    def pending(self) -> list[VeoJob]:
+        """
+        Return every job that has not finished yet, oldest first.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT operation_name, prompt, filename, status, error, created_at FROM veo_jobs "
+                "WHERE status = ? ORDER BY created_at",
+                (PENDING,),
+            ).fetchall()
+        return [VeoJob(*row) for row in rows]
+
+    def mark_done(self, operation_name: str) -> None:
+        self._set_status(operation_name, DONE, None)
+
+    def mark_failed(self, operation_name: str, error: str) -> None:
+        self._set_status(operation_name, FAILED, error)
+
+    def _set_status(self, operation_name: str, status: str, error: str | None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE veo_jobs SET status = ?, error = ?, updated_at = ? WHERE operation_name = ?",
+                (status, error, time.time(), operation_name),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def video_uris(operation: types.GenerateVideosOperation) -> list[str]:
+    """
+    Extract the download URIs of the generated samples of a finished operation.
+    """
+    response = operation.response
+    if isinstance(response, dict):
+        return [sample['video']['uri'] for sample in response['generateVideoResponse']['generatedSamples']]
+    result = operation.result or response
+    return [generated.video.uri for generated in result.generated_videos]
+
+
+class VeoJobPoller:
+    """
+    Single background poller for all pending Veo operations.
+
+    Instead of one sleep loop per generation, one task walks the pending jobs in
+    batches of VEO_POLL_BATCH_SIZE concurrent status checks every VEO_POLL_INTERVAL
+    seconds, downloads finished videos and resolves whoever is waiting on them.
+    Jobs whose operation no longer exists, that keep failing to poll, or that are
+    older than VEO_JOB_MAX_AGE are marked failed instead of being retried forever.
+    """
+
+    def __init__(self, pool: ClientPool, store: VeoJobStore = None,
+                 interval: float = None, batch_size: int = None,
+                 max_failures: int = None, max_age: float = None):
+        """
+        Args:
+            pool (ClientPool): Clients used to query operations and download files. Each job is
+                               polled on the client pinned to its filename, the one that submitted it.
+            store (VeoJobStore): Durable job store. Opened from settings when omitted.
+            interval (float): Seconds between polling rounds.
+            batch_size (int): Maximum number of concurrent status checks.
+            max_failures (int): Consecutive failed status checks before a job is given up. Defaults to VEO_POLL_MAX_FAILURES.
+            max_age (float): Seconds after submission before a job is given up. Defaults to VEO_JOB_MAX_AGE.
+        """
+        self.pool = pool
+        self._store = store
+        self.interval = settings.VEO_POLL_INTERVAL if interval is None else interval
+        self.batch_size = batch_size or settings.VEO_POLL_BATCH_SIZE
+        self.max_failures = max_failures or settings.VEO_POLL_MAX_FAILURES
+        self.max_age = max_age or settings.VEO_JOB_MAX_AGE
+        self._failures: dict[str, int] = {}
+        self._waiters: dict[str, list[asyncio.Future]] = {}
+        self._task: asyncio.Task | None = None
+
+    @property
+    def store(self) -> VeoJobStore:
+        if self._store is None:
+            self._store = VeoJobStore()
+        return self._store
+
+    async def submit(self, operation: types.GenerateVideosOperation, prompt: str, filename: str) -> list[str]:
+        """
+        Persist a submitted operation and wait until its videos are on disk.
+
+        Args:
+            operation (types.GenerateVideosOperation): The operation returned by generate_videos.
+            prompt (str): The prompt the operation was submitted with.
+            filename (str): Base name for the saved video files.
+
+        Returns:
+            list[str]: Paths of the downloaded videos.
+        """
+        await io_executor.run_io(self.store.add, operation.name, prompt, filename)
+        return await self.wait(operation.name)
+
+    async def wait(self, operation_name: str) -> list[str]:
+        """
+        Wait for an already recorded operation to be downloaded.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(operation_name, []).append(future)
+        self._ensure_running()
+        return await future
+
+    async def resume(self) -> int:
+        """
+        Resume polling every job left pending by a previous process.
+
+        Returns:
+            int: The number of pending jobs found.
+        """
+        jobs = await io_executor.run_io(self.store.pending)
+        if jobs:
+            self._ensure_running()
+        return len(jobs)
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            jobs = await io_executor.run_io(self.store.pending)
+            # Waiters for jobs finished by another process are settled from the store.
+            pending_names = {job.operation_name for job in jobs}
+            for name in list(self._waiters):
+                if name not in pending_names:
+                    await self._settle_from_store(name)
+            if not jobs:
+                # No await between this check and returning: a waiter registered while the
+                # store was being read is either seen here or finds this task done and restarts it.
+                if not self._waiters:
+                    return
+                continue
+            for start in range(0, len(jobs), self.batch_size):
+                batch = jobs[start:start + self.batch_size]
+                await asyncio.gather(*(self._check(job) for job in batch))
+            await asyncio.sleep(self.interval)
+
+    async def _check(self, job: VeoJob) -> None:
+        if job.created_at and time.time() - job.created_at > self.max_age:
+            await self._fail(job, f"not finished after {self.max_age / 3600:.0f}h")
+            return
+        try:
+            async with self.pool.acquire(affinity=job.filename, require_files_api=True) as client:
+                operation = await client.aio.operations.get(types.GenerateVideosOperation(name=job.operation_name))
+        except Exception as e:
+            failures = self._failures.get(job.operation_name, 0) + 1
+            self._failures[job.operation_name] = failures
+            if isinstance(e, errors.ClientError) and e.code == 404:
+                await self._fail(job, f"operation no longer exists: {e}")
+            elif failures >= self.max_failures:
+                await self._fail(job, f"polling failed {failures} times in a row: {e}")
+            else:
+                print(f"⚠️ Could not poll video job {job.operation_name}: {e}")
+            return
+        self._failures.pop(job.operation_name, None)
+        if not operation.done:
+            return
+        if operation.error:
+            await self._fail(job, str(operation.error))
+            return
+        try:
+            paths = []
+            for n, video_uri in enumerate(video_uris(operation)):
+                async with self.pool.acquire(affinity=job.filename, require_files_api=True) as client:
+                    video_data = await client.aio.files.download(file=video_uri)
+                path = f"{job.filename}_{n}.mp4"
+                await io_executor.write_bytes(path, video_data)
+                paths.append(path)
+        except Exception as e:
+            # Leave the job pending so the next round (or the next process) retries the download.
+            print(f"⚠️ Could not download video job {job.operation_name}: {e}")
+            return
+        await io_executor.run_io(self.store.mark_done, job.operation_name)
+        print(f"🎬 Video job {job.operation_name} saved to {', '.join(paths)}")
+        self._resolve(job.operation_name, result=paths)
+
+    async def _fail(self, job: VeoJob, error: str) -> None:
+        self._failures.pop(job.operation_name, None)
+        await io_executor.run_io(self.store.mark_failed, job.operation_name, error)
+        print(f"⚠️ Video job {job.operation_name} failed: {error}")
+        self._resolve(job.operation_name, error=RuntimeError(f"Video generation failed: {error}"))
+
+    async def _settle_from_store(self, operation_name: str) -> None:
+        job = await io_executor.run_io(self.store.get, operation_name)
+        if job is None:
+            self._resolve(operation_name, error=ValueError(f"Unknown video job {operation_name}"))
+        elif job.status == FAILED:
+            self._resolve(operation_name, error=RuntimeError(f"Video generation failed: {job.error}"))
+        elif job.status == DONE:
+            self._resolve(operation_name, result=[])
+
+    def _resolve(self, operation_name: str, result: list[str] = None, error: Exception = None) -> None:
+        for future in self._waiters.pop(operation_name, []):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
@@ -0,0 +1,224 @@
+import asyncio
+import io
+import threading
+from dataclasses import dataclass, field
+from typing import Any
+import imageio_ffmpeg
+import numpy as np
+from PIL import Image
+from settings import settings
+
+HISTOGRAM_BINS = 32
+
+
+@dataclass
+class Keyframe:
+    timestamp: float
+    frame_index: int
+    image_bytes: bytes  # JPEG-encoded frame
+
+
+@dataclass
+class TrackEntry:
+    timestamp: float
+    frame_index: int
+    result: Any
+
+
+@dataclass
+class VideoTrack:
+    """
+    Time-indexed analysis results for a video, one entry per keyframe.
+    """
+    video_path: str
+    entries: list[TrackEntry] = field(default_factory=list)
+
+    def at(self, timestamp: float) -> TrackEntry | None:
+        """
+        Return the entry describing the scene on screen at timestamp (the last keyframe at or before it).
+        """
+        current = None
+        for entry in self.entries:
+            if entry.timestamp > timestamp:
+                break
+            current = entry
+        return current
+
+    def to_list(self) -> list[dict]:
+        """
+        Serialize the track to JSON-friendly dictionaries.
+        """
+        return [
+            {
+                "timestamp": entry.timestamp,
+                "frame_index": entry.frame_index,
+                "result": entry.result.to_list() if hasattr(entry.result, "to_list") else entry.result,
+            }
+            for entry in self.entries
+        ]
+
+
+def color_histogram(frame: np.ndarray, bins: int = HISTOGRAM_BINS) -> np.ndarray:
+    """
+    Compute a normalized per-channel color histogram of an RGB frame.
+
+    The frame is subsampled 4x in each direction and all three channels are counted
+    in a single bincount call.
+
+    Args:
+        frame (np.ndarray): (H, W, 3) uint8 RGB frame.
+        bins (int): Bins per channel; must divide 256.
+
+    Returns:
+        np.ndarray: float32 (3 * bins,) histogram summing to 3.
+    """
+    sample = frame[::4, ::4].reshape(-1, 3)
+    shift = int(np.log2(256 // bins))
+    indices = (sample >> shift).astype(np.intp) + np.arange(3) * bins
+    counts = np.bincount(indices.ravel(), minlength=3 * bins)
+    return (counts / len(sample)).astype(np.float32)
+
+
+def scene_change(previous: np.ndarray, current: np.ndarray) -> float:
+    """
+    Return the histogram distance between two frames in [0, 1]; 0 means identical color distributions.
+    """
+    return float(np.abs(previous - current).sum() / 6.0)
+
+
+def iter_keyframes(video_path: str, sample_fps: float = None, scene_threshold: float = None,
+                   max_interval: float = None):
+    """
+    Stream a video and yield only frames that differ visibly from the last kept one.
+
+    Frames are decoded one at a time by ffmpeg at sample_fps, so memory use does not
+    depend on clip length. A frame is kept when its histogram distance to the last
+    keyframe exceeds scene_threshold, or when max_interval seconds have passed.
+
+    Args:
+        video_path (str): Path to the video.
+        sample_fps (float): Frames per second to decode. Defaults to VIDEO_SAMPLE_FPS.
+        scene_threshold (float): Scene-change distance in [0, 1]. Defaults to VIDEO_SCENE_THRESHOLD.
+        max_interval (float): Longest gap in seconds between keyframes. Defaults to VIDEO_MAX_KEYFRAME_INTERVAL.
+
+    Yields:
+        Keyframe: JPEG-encoded keyframes in time order.
+    """
+    sample_fps = sample_fps or settings.VIDEO_SAMPLE_FPS
+    scene_threshold = settings.VIDEO_SCENE_THRESHOLD if scene_threshold is None else scene_threshold
+    max_interval = max_interval or settings.VIDEO_MAX_KEYFRAME_INTERVAL
+
+    reader = imageio_ffmpeg.read_frames(video_path, output_params=["-vf", f"fps={sample_fps}"])
+    try:
+        meta = next(reader)
+        width, height = meta["size"]
+        last_histogram = None
+        last_timestamp = None
+        for frame_index, raw in enumerate(reader):
+            frame = np.frombuffer(raw, dtype=np.uint8).reshape(height, width, 3)
+            timestamp = frame_index / sample_fps
+            histogram = color_histogram(frame)
+            if (last_histogram is not None
+                    and scene_change(last_histogram, histogram) < scene_threshold
+                    and timestamp - last_timestamp < max_interval):
+                continue
+            last_histogram = histogram
+            last_timestamp = timestamp
+            with io.BytesIO() as buffer:
+                Image.fromarray(frame).save(buffer, format="JPEG", quality=90)
+                yield Keyframe(timestamp, frame_index, buffer.getvalue())
+    finally:
+        reader.close()
+
+
+async def stream_keyframes(video_path: str, sample_fps: float = None, scene_threshold: float = None,
+                           max_interval: float = None):
+    """
+    Async wrapper around iter_keyframes.
+
+    Decoding runs on a dedicated thread, since it lasts as long as the clip and would
+    otherwise hold an I/O pool worker that short jobs need. Keyframes are handed over
+    through a bounded queue, so analysis can start on early keyframes while the rest of the clip is
+    still being decoded.
+
+    Yields:
+        Keyframe: JPEG-encoded keyframes in time order.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=settings.VIDEO_KEYFRAME_QUEUE_SIZE)
+    done = object()
+    stop = False
+    finished = loop.create_future()
+
+    def produce():
+        try:
+            for keyframe in iter_keyframes(video_path, sample_fps, scene_threshold, max_interval):
+                if stop:
+                    return
+                asyncio.run_coroutine_threadsafe(queue.put(keyframe), loop).result()
+        except Exception as e:
+            asyncio.run_coroutine_threadsafe(queue.put(e), loop).result()
+        finally:
+            asyncio.run_coroutine_threadsafe(queue.put(done), loop).result()
+            loop.call_soon_threadsafe(finished.set_result, None)
+
+    threading.Thread(target=produce, name="image-engineer-keyframes", daemon=True).start()
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise ValueError(f"Could not read video {video_path}: {item}")
+            yield item
+    finally:
+        stop = True
+        # Drain so a producer blocked on a full queue can observe the stop flag and exit.
+        while not finished.done():
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                await asyncio.sleep(0.01)
+
+
+async def analyze_video(video_path: str, analyze_batch, sample_fps: float = None, scene_threshold: float = None,
+                        batch_size: int = None) -> VideoTrack:
+    """
+    Analyze the keyframes of a video and return the results as a time-indexed track.
+
+    Keyframes are grouped into batches of batch_size and each batch is handed to
+    analyze_batch as soon as it fills, so batches run concurrently with decoding
+    and with each other.
+
+    Args:
+        video_path (str): Path to the video.
+        analyze_batch (callable): Coroutine taking a list of encoded images and returning one result per image.
+        sample_fps (float): Frames per second to decode.
+        scene_threshold (float): Scene-change distance in [0, 1] below which frames are skipped.
+        batch_size (int): Keyframes per analysis batch. Defaults to VIDEO_ANALYSIS_BATCH_SIZE.
+
+    Returns:
+        VideoTrack: One entry per keyframe, in time order.
+    """
+    batch_size = batch_size or settings.VIDEO_ANALYSIS_BATCH_SIZE
+    keyframes: list[Keyframe] = []
+    tasks = []
+    batch: list[Keyframe] = []
+
+    async def run(frames: list[Keyframe]):
+        return await analyze_batch([frame.image_bytes for frame in frames])
+
+    async for keyframe in stream_keyframes(video_path, sample_fps, scene_threshold):
+        keyframes.append(keyframe)
+        batch.append(keyframe)
+        if len(batch) == batch_size:
+            tasks.append(asyncio.ensure_future(run(batch)))
+            batch = []
+    if batch:
+        tasks.append(asyncio.ensure_future(run(batch)))
+
+    results = [result for batch_results in await asyncio.gather(*tasks) for result in batch_results]
+    return VideoTrack(
+        video_path=video_path,
+        entries=[TrackEntry(frame.timestamp, frame.frame_index, result) for frame, result in zip(keyframes, results)],
+    )
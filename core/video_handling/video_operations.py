@@ -1,3 +1,9 @@
+import asyncio
+import os
+import tempfile
+from collections import Counter
+import imageio_ffmpeg
+from core.io_handling import io_executor
 from moviepy.editor import VideoFileClip, AudioFileClip, CompositeAudioClip
 
 def add_audio_to_video(video_path, primary_audio_path, secondary_audio_path, output_path, start_time):
@@ -37,5 +43,129 @@ def add_audio_to_video(video_path, primary_audio_path, secondary_audio_path, out
     except Exception as e:
         print(f"An error occurred while adding audio to video: {e}")
 
+async def mux_audio_stream(video_path, audio_chunks, output_path, audio_format="mp3"):
+    """
+    Mux a streamed audio track into a video while the audio is still arriving.
+
+    Chunks are piped straight into ffmpeg's stdin; the video stream is copied without
+    re-encoding and the audio is encoded to AAC. The output ends with the shorter stream.
+
+    Args:
+        video_path (str): Path to the video file.
+        audio_chunks (AsyncIterator[bytes]): Encoded audio chunks, e.g. from sounds.text_to_speech_stream_long.
+        output_path (str): Path where the muxed video will be saved.
+        audio_format (str): ffmpeg demuxer name of the incoming audio.
+
+    Returns:
+        str: The output path.
+    """
+    process = await asyncio.create_subprocess_exec(
+        imageio_ffmpeg.get_ffmpeg_exe(), "-hide_banner", "-loglevel", "error", "-y",
+        "-i", video_path, "-f", audio_format, "-i", "pipe:0",
+        "-map", "0:v:0", "-map", "1:a:0", "-c:v", "copy", "-c:a", "aac", "-shortest", output_path,
+        stdin=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+    )
+    stderr_task = asyncio.ensure_future(process.stderr.read())
+    try:
+        async for chunk in audio_chunks:
+            process.stdin.write(chunk)
+            await process.stdin.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        pass  # ffmpeg stopped reading (e.g. -shortest reached); its exit status tells the rest
+    except BaseException:
+        process.kill()
+        await process.wait()
+        raise
+    finally:
+        if not process.stdin.is_closing():
+            process.stdin.close()
+    errors = await stderr_task
+    if await process.wait() != 0:
+        raise RuntimeError(f"ffmpeg failed to mux audio: {errors.decode(errors='replace').strip()}")
+    return output_path
+
+def probe_video(video_path):
+    """
+    Read the stream parameters that decide whether clips can be joined without re-encoding.
+
+    Args:
+        video_path (str): Path to the video file.
+
+    Returns:
+        dict: codec, pix_fmt, fps, size, audio_codec (None without audio) and duration.
+    """
+    reader = imageio_ffmpeg.read_frames(video_path)
+    try:
+        meta = next(reader)
+    finally:
+        reader.close()
+    return {
+        "codec": meta.get("codec"),
+        "pix_fmt": meta.get("pix_fmt", "").split("(")[0],
+        "fps": meta.get("fps"),
+        "size": tuple(meta.get("size", ())),
+        "audio_codec": meta.get("audio_codec"),
+        "duration": meta.get("duration"),
+    }
+
+async def _run_ffmpeg(*args):
+    process = await asyncio.create_subprocess_exec(
+        imageio_ffmpeg.get_ffmpeg_exe(), "-hide_banner", "-loglevel", "error", "-y", *args,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    _, errors = await process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {errors.decode(errors='replace').strip()}")
+
+async def concat_videos(video_paths, output_path):
+    """
+    Join clips end to end.
+
+    When every clip shares codec, resolution, frame rate, pixel format and audio codec the
+    concat demuxer copies the streams, which takes well under a second regardless of length.
+    Otherwise all clips are scaled to the most common parameters and re-encoded in one pass.
+
+    Args:
+        video_paths (list[str]): Clips in playback order.
+        output_path (str): Path where the joined video will be saved.
+
+    Returns:
+        str: The output path.
+    """
+    if not video_paths:
+        raise ValueError("No clips to concatenate")
+    probes = await asyncio.gather(*(io_executor.run_io(probe_video, path) for path in video_paths))
+    signatures = [tuple(probe[key] for key in ("codec", "pix_fmt", "fps", "size", "audio_codec")) for probe in probes]
+
+    if len(set(signatures)) == 1:
+        # The concat demuxer reads a list file; paths are made absolute and quoted for it.
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as list_file:
+            for path in video_paths:
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                list_file.write(f"file '{escaped}'\n")
+        try:
+            await _run_ffmpeg("-f", "concat", "-safe", "0", "-i", list_file.name,
+                              "-c", "copy", "-movflags", "+faststart", output_path)
+        finally:
+            os.unlink(list_file.name)
+        return output_path
+
+    _, pix_fmt, fps, (width, height), _ = Counter(signatures).most_common(1)[0][0]
+    with_audio = all(probe["audio_codec"] for probe in probes)
+    print(f"⚠️ Clips differ in codec parameters, re-encoding to {width}x{height} @ {fps} fps")
+    inputs, filters, streams = [], [], ""
+    for n, path in enumerate(video_paths):
+        inputs += ["-i", path]
+        filters.append(
+            f"[{n}:v]scale={width}:{height}:force_original_aspect_ratio=decrease,"
+            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={fps},format={pix_fmt}[v{n}]"
+        )
+        streams += f"[v{n}]" + (f"[{n}:a]" if with_audio else "")
+    filters.append(f"{streams}concat=n={len(video_paths)}:v=1:a={int(with_audio)}[v]" + ("[a]" if with_audio else ""))
+    maps = ["-map", "[v]"] + (["-map", "[a]", "-c:a", "aac"] if with_audio else [])
+    await _run_ffmpeg(*inputs, "-filter_complex", ";".join(filters), *maps,
+                      "-c:v", "libx264", "-movflags", "+faststart", output_path)
+    return output_path
+
 # Example usage:
 #add_audio_to_video("mousead.mp4", "mouse_high_energy.mp3", "areyouready.mp3", "output_with_audio.mp4", 6)
\ No newline at end of file
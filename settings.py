@@ -2,14 +2,67 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     GOOGLE_API_KEY: str
+    GOOGLE_API_KEYS: list[str] = []
+    GOOGLE_CLOUD_PROJECTS: list[str] = []
+    GOOGLE_CLOUD_LOCATION: str = "us-central1"
+    CLIENT_POOL_WEIGHTS: list[float] = []
+    CLIENT_POOL_COOLDOWN_SECONDS: float = 60
+    CLIENT_POOL_MAX_FAILURES: int = 3
     GOOGLE_FAST_MODEL: str = "gemini-2.0-flash-001"
     GOOGLE_MODEL: str = "gemini-2.0-flash-lite"
+    GOOGLE_PRO_MODEL: str = "gemini-2.5-pro"
     GOOGLE_IMAGE_GENERATION_MODEL: str = "gemini-2.0-flash-exp-image-generation"
+    GOOGLE_IMAGEN_MODEL: str = "imagen-3.0-generate-002"
     GOOGLE_VIDEO_GENERATION_MODEL: str = "veo-2.0-generate-001"
     ELEVEN_LABS_API_KEY: str
+    ELEVEN_LABS_TIMEOUT: float = 120
+    SOUND_EFFECT_CROSSFADE_SECONDS: float = 2
+    SOUND_EFFECT_CACHE_SIZE: int = 32
+    TTS_SEGMENT_MAX_CHARS: int = 400
+    TTS_MAX_CONCURRENT: int = 3
     TEMPERATURE: float = 1
     MAX_TOKENS: int = 4096
     MAX_CONCURRENCE_CALLS: int = 10
+    ROUTER_ENABLED: bool = True
+    ROUTER_LATENCY_SLO: float = 8.0
+    ROUTER_MAX_QUEUE_DEPTH: int = 8
+    ROUTER_MAX_ERROR_RATE: float = 0.2
+    ROUTER_WINDOW: int = 50
+    ROUTER_WINDOW_SECONDS: float = 300
+    ROUTER_PROBE_RATE: float = 0.05
+    ROUTER_TASK_LATENCY_SLOS: dict[str, float] = {"text": 30.0}
+    IMAGEN_MAX_IMAGES_PER_REQUEST: int = 4
+    PHASH_METHOD: str = "phash"
+    PHASH_SIMILARITY_THRESHOLD: float = 0.9
+    PHASH_INDEX_MAX_SIZE: int = 1024
+    PHASH_MAX_INDEXES: int = 16
+    VIDEO_SAMPLE_FPS: float = 2
+    VIDEO_SCENE_THRESHOLD: float = 0.25
+    VIDEO_MAX_KEYFRAME_INTERVAL: float = 10
+    VIDEO_ANALYSIS_BATCH_SIZE: int = 8
+    VIDEO_KEYFRAME_QUEUE_SIZE: int = 16
+    IO_MAX_WORKERS: int = 8
+    IO_MAX_PENDING: int = 64
+    LOOP_LAG_MONITOR: bool = False
+    LOOP_LAG_THRESHOLD: float = 0.1
+    LOOP_LAG_INTERVAL: float = 0.05
+    OUTPUT_IMAGE_PRESET: str = "auto"
+    OUTPUT_WRITER_WORKERS: int = 2
+    OUTPUT_THUMBNAIL_SIZE: tuple[int, int] | None = None
+    VEO_JOB_DB_PATH: str = "veo_jobs.sqlite3"
+    VEO_POLL_INTERVAL: float = 10
+    VEO_POLL_BATCH_SIZE: int = 8
+    VEO_POLL_MAX_FAILURES: int = 30
+    VEO_JOB_MAX_AGE: float = 48 * 3600
+    VEO_MIN_SHOT_SECONDS: int = 5
+    VEO_MAX_SHOT_SECONDS: int = 8
+    STORYBOARD_TOTAL_SECONDS: int = 30
+    STORYBOARD_MAX_SHOTS: int = 8
+    DAEMON_SOCKET_PATH: str = "/tmp/image-engineer.sock"
+    DAEMON_AUTO_CONNECT: bool = True
+    DAEMON_MAX_CONCURRENT: int = 16
+    DAEMON_MAX_CONCURRENT_VIDEOS: int = 8
+    DAEMON_CACHE_SIZE: int = 256
 
     class Config:
         env_file = ".env"